@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import re
+
+from copystatic import place_file
+from manifest import hash_file, load_manifest, remove_output, save_manifest
+from output import write_output
+from walk import default_ignore, walk_files
+
+# Hex digits of the content hash kept in fingerprinted file names.
+hash_length = 8
+
+asset_manifest_name = "asset-manifest.json"
+
+reference_pattern = re.compile(r"""(\b(?:href|src)\s*=\s*["'])([^"']+)(["'])""")
+
+
+class AssetMap:
+    """Site URLs of static files mapped to their fingerprinted URLs.
+
+    hashes maps each static file's normalized source path to its content
+    hash, which is what pages referencing it are checked against, and paths
+    maps each plain URL to that source path.
+    """
+
+    def __init__(self, urls, hashes, paths=None):
+        self.urls = urls
+        self.hashes = hashes
+        self.paths = paths if paths is not None else {}
+
+    def rewrite(self, url):
+        """Return the fingerprinted URL for a site-absolute URL of a static
+        file, keeping any query or fragment; any other URL is returned as is."""
+        end = site_path_end(url)
+        if end is None:
+            return url
+        fingerprinted = self.urls.get(url[:end])
+        if fingerprinted is None:
+            return url
+        return fingerprinted + url[end:]
+
+    def rewrite_references(self, text):
+        """Rewrite the href and src attributes in an HTML text, such as the
+        page template."""
+        return reference_pattern.sub(lambda m: m.group(1) + self.rewrite(m.group(2)) + m.group(3), text)
+
+    def digest(self, static_paths=None):
+        """Hash of the fingerprints of the given static files (all of them by
+        default), for telling whether output referencing them is stale."""
+        if static_paths is None:
+            static_paths = self.hashes
+        digest = hashlib.sha256()
+        for path in sorted(static_paths):
+            digest.update(f"{path}\0{self.hashes.get(path, '')}\n".encode())
+        return digest.hexdigest()
+
+    def references_digest(self, urls):
+        """digest() of just the static files the given URLs (such as a page's
+        link and image targets) point at."""
+        static_paths = set()
+        for url in urls:
+            end = site_path_end(url)
+            if end is not None and url[:end] in self.paths:
+                static_paths.add(self.paths[url[:end]])
+        return self.digest(static_paths)
+
+
+def site_path_end(url):
+    """Where the path of a site-absolute URL ends (before any query or
+    fragment), or None for any other URL."""
+    if not url.startswith("/") or url.startswith("//"):
+        return None
+    end = len(url)
+    for separator in ("?", "#"):
+        index = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+    return end
+
+
+def fingerprint_path(rel_path, content_hash):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{content_hash[:hash_length]}{ext}"
+
+
+def fingerprint_files(source_dir_path, dest_dir_path, manifest_path, link_mode="copy", ignore=default_ignore):
+    """Place a content-hashed copy of every static file next to its plain
+    copy (index.css -> index.3f9a1c2b.css) and write asset-manifest.json
+    mapping the plain URLs to the fingerprinted ones.
+
+    A file is only hashed when its size or mtime differs from the previous
+    run, as recorded in the manifest's "fingerprints" section. Copies whose
+    content has gone are removed. Returns an AssetMap."""
+    manifest = load_manifest(manifest_path)
+    old_entries = manifest["fingerprints"]
+    entries = {}
+    urls = {}
+    hashes = {}
+    paths = {}
+    hashed = 0
+
+    for rel_path in walk_files(source_dir_path, ignore):
+        from_path = os.path.join(source_dir_path, rel_path)
+        from_stat = os.stat(from_path)
+        entry = old_entries.get(rel_path)
+        if entry is None or entry["size"] != from_stat.st_size or entry["mtime_ns"] != from_stat.st_mtime_ns:
+            entry = {"size": from_stat.st_size, "mtime_ns": from_stat.st_mtime_ns, "hash": hash_file(from_path)}
+            hashed += 1
+        entries[rel_path] = entry
+        fingerprinted = fingerprint_path(rel_path, entry["hash"])
+        dest_path = os.path.join(dest_dir_path, fingerprinted)
+        if not os.path.exists(dest_path):
+            print(f" * {from_path} -> {dest_path}")
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            # A hardlink would change along with a source edited in place,
+            # and a fingerprinted file must never change.
+            place_file(from_path, dest_path, "copy" if link_mode == "hardlink" else link_mode)
+        url = "/" + rel_path.replace(os.sep, "/")
+        urls[url] = "/" + fingerprinted.replace(os.sep, "/")
+        hashes[os.path.normpath(from_path)] = entry["hash"]
+        paths[url] = os.path.normpath(from_path)
+
+    live = {fingerprint_path(rel_path, entry["hash"]) for rel_path, entry in entries.items()}
+    for rel_path, entry in old_entries.items():
+        fingerprinted = fingerprint_path(rel_path, entry["hash"])
+        if fingerprinted not in live:
+            remove_output(os.path.join(dest_dir_path, fingerprinted), dest_dir_path)
+
+    asset_manifest_path = os.path.join(dest_dir_path, asset_manifest_name)
+    manifest["outputs"][asset_manifest_path], _ = write_output(
+        asset_manifest_path,
+        lambda fp: json.dump(urls, fp, indent=1, sort_keys=True),
+        manifest["outputs"].get(asset_manifest_path),
+    )
+    manifest["fingerprints"] = entries
+    save_manifest(manifest_path, manifest)
+    print(f"Fingerprinted {len(entries)} static file(s), {hashed} hashed")
+    return AssetMap(urls, hashes, paths)
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from block_markdown import markdown_to_blocks, markdown_to_html_node, block_to_block_type, block_type_paragraph
+from corpus import shapes, write_corpus
+from gencontent import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+
+template = "<!DOCTYPE html><html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def read_tree(dir_path):
+    documents = []
+    for dir_name, _, filenames in os.walk(dir_path):
+        for filename in sorted(filenames):
+            with open(os.path.join(dir_name, filename)) as f:
+                documents.append(f.read())
+    return documents
+
+
+def bench_shape(shape, scale, repeat):
+    with tempfile.TemporaryDirectory() as root:
+        content = os.path.join(root, "content")
+        template_path = os.path.join(root, "template.html")
+        with open(template_path, "w") as f:
+            f.write(template)
+        pages = write_corpus(content, shape, scale)
+        documents = read_tree(content)
+        blocks = [block for document in documents for block in markdown_to_blocks(document)]
+        paragraphs = [" ".join(block.split("\n")) for block in blocks if block_to_block_type(block) == block_type_paragraph]
+        trees = [markdown_to_html_node(document) for document in documents]
+
+        def inline():
+            for paragraph in paragraphs:
+                text_to_textnodes(paragraph)
+
+        stages = {
+            "markdown_to_blocks": best_of(repeat, lambda: [markdown_to_blocks(d) for d in documents]),
+            "text_to_textnodes": best_of(repeat, inline),
+            "markdown_to_html_node": best_of(repeat, lambda: [markdown_to_html_node(d) for d in documents]),
+            "to_html": best_of(repeat, lambda: [tree.to_html() for tree in trees]),
+            "generate_pages_recursive": best_of(
+                repeat,
+                lambda: generate_pages_recursive(content, template_path, os.path.join(root, "public"), verbose=False),
+            ),
+        }
+        return {
+            "pages": pages,
+            "bytes": sum(len(d.encode()) for d in documents),
+            "blocks": len(blocks),
+            "stages": stages,
+        }
+
+
+def compare(results, baseline, threshold):
+    regressions = 0
+    print(f"{'shape':<8} {'stage':<26} {'baseline s':>11} {'current s':>10} {'ratio':>7}")
+    for shape, result in results["results"].items():
+        base = baseline["results"].get(shape)
+        if base is None:
+            continue
+        for stage, seconds in result["stages"].items():
+            base_seconds = base["stages"].get(stage)
+            if not base_seconds:
+                continue
+            ratio = seconds / base_seconds
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{shape:<8} {stage:<26} {base_seconds:>11.4f} {seconds:>10.4f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generator on synthetic content corpora.")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(shapes), default=sorted(shapes))
+    parser.add_argument("--scale", type=float, default=0.1, help="multiplier on each shape's page count")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    for shape in args.shapes:
+        result = bench_shape(shape, args.scale, args.repeat)
+        results["results"][shape] = result
+        stages = ", ".join(f"{stage} {seconds:.4f}s" for stage, seconds in result["stages"].items())
+        print(f"{shape}: {result['pages']} pages, {result['bytes']} bytes: {stages}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
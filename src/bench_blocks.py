@@ -0,0 +1,105 @@
+import argparse
+import timeit
+
+from block_markdown import (
+    block_to_block_type,
+    block_to_html_node,
+    block_type_code,
+    block_type_heading,
+    block_type_olist,
+    block_type_paragraph,
+    block_type_quote,
+    block_type_ulist,
+    markdown_to_blocks,
+)
+
+
+def block_to_block_type_reference(block):
+    # The classifier classify_block replaced, kept to compare against: it
+    # splits every block and checks each line against each candidate type.
+    lines = block.split("\n")
+
+    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+        return block_type_heading
+    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+        return block_type_code
+    if block.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return block_type_paragraph
+        return block_type_quote
+    if block.startswith("* "):
+        for line in lines:
+            if not line.startswith("* "):
+                return block_type_paragraph
+        return block_type_ulist
+    if block.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return block_type_paragraph
+        return block_type_ulist
+    if block.startswith("1. "):
+        i = 1
+        for line in lines:
+            if not line.startswith(f"{i}. "):
+                return block_type_paragraph
+            i += 1
+        return block_type_olist
+    return block_type_paragraph
+
+
+def make_document(kind, blocks, lines):
+    parts = []
+    for b in range(blocks):
+        if kind == "ulist":
+            parts.append("\n".join(f"* item {b}-{i} with some words" for i in range(lines)))
+        elif kind == "olist":
+            parts.append("\n".join(f"{i}. item {b}-{i} with some words" for i in range(1, lines + 1)))
+        elif kind == "quote":
+            parts.append("\n".join(f"> quoted line {b}-{i} with some words" for i in range(lines)))
+        elif kind == "broken":
+            # Looks like a list until the last line, so classification falls
+            # back to paragraph only after inspecting every line.
+            items = [f"- item {b}-{i} with some words" for i in range(lines - 1)]
+            parts.append("\n".join(items + ["trailing paragraph line"]))
+    return "\n\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time block classification and conversion on list/quote-heavy input.")
+    parser.add_argument("--blocks", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=20, help="lines per block")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.blocks} blocks of {args.lines} lines")
+    print(f"{'document':>9} {'reference ms':>13} {'classify ms':>12} {'speedup':>8} {'convert ms':>11}")
+    for kind in ("ulist", "olist", "quote", "broken"):
+        blocks = markdown_to_blocks(make_document(kind, args.blocks, args.lines))
+        assert [block_to_block_type(block) for block in blocks] == [
+            block_to_block_type_reference(block) for block in blocks
+        ]
+
+        def reference():
+            for block in blocks:
+                block_to_block_type_reference(block)
+
+        def classify():
+            for block in blocks:
+                block_to_block_type(block)
+
+        def convert():
+            for block in blocks:
+                block_to_html_node(block)
+
+        reference_seconds = min(timeit.repeat(reference, number=1, repeat=args.repeat))
+        classify_seconds = min(timeit.repeat(classify, number=1, repeat=args.repeat))
+        convert_seconds = min(timeit.repeat(convert, number=1, repeat=args.repeat))
+        print(
+            f"{kind:>9} {reference_seconds * 1000:>13.2f} {classify_seconds * 1000:>12.2f} "
+            f"{reference_seconds / classify_seconds:>7.2f}x {convert_seconds * 1000:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import timeit
+
+from inline_markdown import image_pattern, iter_images, iter_links, link_pattern, text_to_textnodes, text_to_textnodes_multipass
+
+SENTENCES = [
+    "Plain prose without any markup at all, just words and punctuation.",
+    "Some **bold text** and some *italic text* in the same sentence.",
+    "Inline `code()` next to a [link to docs](https://example.com/docs/page).",
+    "An ![inline image](/images/figure.png) followed by more prose.",
+    "Several [one](/1), [two](/2) and [three](/3) links in a row.",
+]
+
+
+# Inputs that make a backtracking scan restart at every bracket.
+ADVERSARIAL = {
+    "open brackets": lambda n: "[" * n + "](x)",
+    "unclosed urls": lambda n: "[](" * n,
+    "image openers": lambda n: "![a" * n + "](b)",
+    "bare pairs": lambda n: "[a](" * n,
+}
+
+
+def make_paragraph(sentences):
+    return " ".join(SENTENCES[i % len(SENTENCES)] for i in range(sentences))
+
+
+def bench_adversarial(repeat):
+    print()
+    print(f"{'input':>14} {'chars':>7} {'regex ms':>10} {'scan ms':>9}")
+    for name, make in ADVERSARIAL.items():
+        for n in (1000, 2000, 4000, 8000):
+            text = make(n)
+
+            def regex():
+                list(link_pattern.finditer(text))
+                list(image_pattern.finditer(text))
+
+            def scan():
+                list(iter_links(text))
+                list(iter_images(text))
+
+            regex_ms = min(timeit.repeat(regex, number=1, repeat=repeat)) * 1000
+            scan_ms = min(timeit.repeat(scan, number=1, repeat=repeat)) * 1000
+            print(f"{name:>14} {len(text):>7} {regex_ms:>10.2f} {scan_ms:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the single-pass and multi-pass inline tokenizers.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'sentences':>9} {'chars':>8} {'multipass ms':>13} {'single ms':>10} {'speedup':>8}")
+    for sentences in (1, 10, 100, 1000, 10000):
+        paragraph = make_paragraph(sentences)
+        assert text_to_textnodes(paragraph) == text_to_textnodes_multipass(paragraph)
+        number = max(1, 10000 // sentences)
+        multipass = min(timeit.repeat(lambda: text_to_textnodes_multipass(paragraph), number=number, repeat=args.repeat))
+        single = min(timeit.repeat(lambda: text_to_textnodes(paragraph), number=number, repeat=args.repeat))
+        multipass_ms = multipass / number * 1000
+        single_ms = single / number * 1000
+        print(f"{sentences:>9} {len(paragraph):>8} {multipass_ms:>13.3f} {single_ms:>10.3f} {multipass / single:>7.2f}x")
+    bench_adversarial(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import gencontent
+from block_markdown import markdown_to_html_node
+from gencontent import extract_title, render_page
+from inline_markdown import text_to_textnodes
+from template import Template
+
+BLOCKS = [
+    "## Heading with **bold** text",
+    "A paragraph with **bold**, *italic*, `code` and a [link](/somewhere).\nIt has a second line with ![an image](/images/a.png).",
+    "* list item one\n* list item **two**\n* list item `three`",
+    "1. first\n2. second\n3. third",
+    "> quoted text\n> continues here",
+    "```\ncode block\n```",
+]
+
+
+def make_markdown(size):
+    parts = ["# Memory benchmark"]
+    length = len(parts[0])
+    i = 0
+    while length < size:
+        block = BLOCKS[i % len(BLOCKS)]
+        parts.append(block)
+        length += len(block) + 2
+        i += 1
+    return "\n\n".join(parts)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def seconds(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report tracemalloc peak per 1 MB of markdown.")
+    parser.add_argument("--megabytes", type=float, default=1.0)
+    args = parser.parse_args()
+
+    size = int(args.megabytes * 1024 * 1024)
+    markdown = make_markdown(size)
+    sentence = BLOCKS[1].replace("\n", " ")
+    paragraph = " ".join([sentence] * (size // (len(sentence) + 1)))
+    megabytes = len(markdown) / (1024 * 1024)
+    paragraph_megabytes = len(paragraph) / (1024 * 1024)
+
+    nodes, inline_peak = measure(text_to_textnodes, paragraph)
+    node, tree_peak = measure(markdown_to_html_node, markdown)
+
+    print(f"TextNodes created:      {len(nodes)}")
+    print(f"text_to_textnodes:      {inline_peak / paragraph_megabytes / (1024 * 1024):.2f} MB peak per MB")
+    print(f"markdown_to_html_node:  {tree_peak / megabytes / (1024 * 1024):.2f} MB peak per MB")
+
+    template = Template("<title>{{ Title }}</title>{{ Content }}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "page.md")
+        with open(source, "w") as f:
+            f.write(markdown)
+        del markdown, node, nodes
+
+        def whole_string():
+            with open(source) as f:
+                markdown = f.read()
+            html = markdown_to_html_node(markdown).to_html()
+            return template.render({"Title": extract_title(markdown), "Content": html})
+
+        dest = os.path.join(tmp, "page.html")
+        _, string_peak = measure(whole_string)
+        gencontent.mmap_threshold = float("inf")
+        _, stream_peak = measure(render_page, source, template, dest)
+        stream_seconds = seconds(render_page, source, template, dest)
+        gencontent.mmap_threshold = 1
+        _, mmap_peak = measure(render_page, source, template, dest)
+        mmap_seconds = seconds(render_page, source, template, dest)
+    print(f"whole-string page:      {string_peak / megabytes / (1024 * 1024):.2f} MB peak per MB")
+    print(f"streamed render_page:   {stream_peak / megabytes / (1024 * 1024):.2f} MB peak per MB, {stream_seconds:.3f}s")
+    print(f"mmap render_page:       {mmap_peak / megabytes / (1024 * 1024):.2f} MB peak per MB, {mmap_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import gzip
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from corpus import shapes, write_corpus
+from gencontent import generate_pages_recursive
+
+default_template_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+
+def tree_size(dir_path):
+    # Total bytes of the output, and of the output gzipped page by page.
+    total = 0
+    gz_total = 0
+    for dir_name, _, filenames in os.walk(dir_path):
+        for filename in filenames:
+            with open(os.path.join(dir_name, filename), "rb") as f:
+                data = f.read()
+            total += len(data)
+            gz_total += len(gzip.compress(data, mtime=0))
+    return total, gz_total
+
+
+def build(content, template_path, dest_dir_path, minify, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content, template_path, dest_dir_path, verbose=False, minify=minify)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, tree_size(dest_dir_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure output size and build time with and without --minify.")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(shapes), default=sorted(shapes))
+    parser.add_argument("--scale", type=float, default=0.1, help="multiplier on each shape's page count")
+    parser.add_argument("--template", default=default_template_path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'shape':<8} {'pages':>6} {'plain bytes':>12} {'minified':>12} {'saved':>7} {'gzip saved':>11} "
+        f"{'plain s':>8} {'minify s':>9}"
+    )
+    for shape in args.shapes:
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            pages = write_corpus(content, shape, args.scale)
+            plain_seconds, (plain, plain_gz) = build(
+                content, args.template, os.path.join(root, "plain"), False, args.repeat
+            )
+            minify_seconds, (minified, minified_gz) = build(
+                content, args.template, os.path.join(root, "minified"), True, args.repeat
+            )
+        print(
+            f"{shape:<8} {pages:>6} {plain:>12} {minified:>12} {(plain - minified) / plain:>6.1%} "
+            f"{(plain_gz - minified_gz) / plain_gz:>10.1%} {plain_seconds:>8.3f} {minify_seconds:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
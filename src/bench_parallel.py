@@ -0,0 +1,45 @@
+import argparse
+import os
+import tempfile
+import time
+
+from corpus import shapes, write_corpus
+from gencontent import find_pages, generate_pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure pages/second against worker count.")
+    parser.add_argument("--shape", choices=sorted(shapes), default="small")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on the shape's page count")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    worker_counts = []
+    workers = 1
+    while workers < args.max_workers:
+        worker_counts.append(workers)
+        workers *= 2
+    worker_counts.append(args.max_workers)
+
+    with tempfile.TemporaryDirectory() as root:
+        content = os.path.join(root, "content")
+        template_path = os.path.join(root, "template.html")
+        with open(template_path, "w") as f:
+            f.write("<html><title>{{ Title }}</title><body>{{ Content }}</body></html>")
+        page_count = write_corpus(content, args.shape, args.scale)
+
+        print(f"{page_count} pages of the {args.shape!r} corpus")
+        print(f"{'workers':>8} {'seconds':>9} {'pages/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in worker_counts:
+            pages = find_pages(content, os.path.join(root, f"public{workers}"))
+            start = time.perf_counter()
+            generate_pages(pages, template_path, workers, verbose=False)
+            elapsed = time.perf_counter() - start
+            if baseline is None:
+                baseline = elapsed
+            print(f"{workers:>8} {elapsed:>9.3f} {page_count / elapsed:>10.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
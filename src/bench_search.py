@@ -0,0 +1,95 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from search import SearchIndex, TermCollector
+
+
+def make_vocabulary(size):
+    rng = random.Random(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def make_page(rng, vocabulary, weights, words):
+    # Word frequencies follow Zipf's law, as they do in natural text.
+    paragraphs = []
+    for _ in range(max(1, words // 50)):
+        paragraphs.append("<p>" + " ".join(rng.choices(vocabulary, cum_weights=weights, k=50)) + "</p>")
+    return "".join(paragraphs)
+
+
+def index_pages(index, pages, dest_dir_path):
+    for i, html in pages:
+        terms = TermCollector()
+        for _ in terms.tee([html]):
+            pass
+        index.add(f"page{i}.md", os.path.join(dest_dir_path, f"page{i}.html"), f"Page {i}", terms.counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time search index builds on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=200, help="words per page")
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction of pages edited for the update")
+    args = parser.parse_args()
+
+    vocabulary = make_vocabulary(args.vocabulary)
+    weights = []
+    total = 0.0
+    for rank in range(1, len(vocabulary) + 1):
+        total += 1 / rank
+        weights.append(total)
+    rng = random.Random(1)
+    pages = [(i, make_page(rng, vocabulary, weights, args.words)) for i in range(args.pages)]
+
+    with tempfile.TemporaryDirectory() as root:
+        store_path = os.path.join(root, "search.json")
+        dest_dir_path = os.path.join(root, "public")
+
+        start = time.perf_counter()
+        index = SearchIndex(store_path, dest_dir_path)
+        index_pages(index, pages, dest_dir_path)
+        collect_seconds = time.perf_counter() - start
+        index.write()
+        index.save()
+        full_seconds = time.perf_counter() - start
+
+        shard_dir = index.dir_path
+        sizes = sorted(os.path.getsize(os.path.join(shard_dir, f)) for f in os.listdir(shard_dir) if f != "docs.json")
+        docs_size = os.path.getsize(os.path.join(shard_dir, "docs.json"))
+        store_size = os.path.getsize(store_path)
+
+        updates = []
+        for edits in (1, max(1, int(args.pages * args.changed))):
+            edited = [(i, make_page(rng, vocabulary, weights, args.words)) for i in rng.sample(range(args.pages), edits)]
+            start = time.perf_counter()
+            index = SearchIndex(store_path, dest_dir_path)
+            load_seconds = time.perf_counter() - start
+            index_pages(index, edited, dest_dir_path)
+            index.write()
+            index.save()
+            updates.append((edits, time.perf_counter() - start, load_seconds, index.written, index.skipped))
+
+    print(f"{args.pages} pages of {args.words} words, {args.vocabulary}-word Zipf vocabulary")
+    print(f"full build:     {full_seconds:.2f}s ({collect_seconds:.2f}s collecting terms, the rest inverting and writing)")
+    for edits, update_seconds, load_seconds, written, skipped in updates:
+        print(
+            f"update:         {update_seconds:.2f}s for {edits} edited page(s) "
+            f"({load_seconds:.2f}s loading the store); {written} file(s) rewritten, {skipped} unchanged"
+        )
+    print(
+        f"shards:         {len(sizes)}, median {sizes[len(sizes) // 2] / 1024:.1f} KiB, "
+        f"largest {sizes[-1] / 1024:.1f} KiB, total {sum(sizes) / 1024 / 1024:.1f} MiB"
+    )
+    print(f"docs.json:      {docs_size / 1024:.1f} KiB; term store {store_size / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import tempfile
+import time
+
+from walk import walk_files
+
+
+def make_tree(root, files, fanout):
+    """Spread files over nested directories, fanout entries per directory,
+    with one ignored .git directory per top-level directory."""
+    for i in range(files):
+        parts = []
+        n = i // fanout
+        while n:
+            parts.append(f"d{n % fanout}")
+            n //= fanout
+        dir_path = os.path.join(root, *reversed(parts))
+        os.makedirs(dir_path, exist_ok=True)
+        open(os.path.join(dir_path, f"page{i}.md"), "w").close()
+    for name in os.listdir(root):
+        git_path = os.path.join(root, name, ".git", "objects")
+        if os.path.isdir(os.path.join(root, name)):
+            os.makedirs(git_path)
+            for i in range(fanout):
+                open(os.path.join(git_path, f"object{i}"), "w").close()
+
+
+def listdir_walk(dir_path, rel_dir_path=""):
+    # The previous recursive discovery: sorted listdir plus a stat per entry.
+    files = []
+    for filename in sorted(os.listdir(dir_path)):
+        from_path = os.path.join(dir_path, filename)
+        rel_path = os.path.join(rel_dir_path, filename)
+        if os.path.isfile(from_path):
+            files.append(rel_path)
+        else:
+            files.extend(listdir_walk(from_path, rel_path))
+    return files
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time file discovery on a large synthetic tree.")
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--fanout", type=int, default=20, help="entries per directory")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, args.files, args.fanout)
+        listdir_seconds, listdir_files = best_of(args.repeat, lambda: listdir_walk(root))
+        scandir_seconds, scandir_files = best_of(args.repeat, lambda: walk_files(root))
+        unfiltered_seconds, _ = best_of(args.repeat, lambda: walk_files(root, ()))
+
+    print(f"{args.files} files, fanout {args.fanout}")
+    print(f"listdir + isfile (recursive):   {listdir_seconds:.3f}s, {len(listdir_files)} files")
+    print(f"scandir walker, no ignores:     {unfiltered_seconds:.3f}s")
+    print(f"scandir walker, default ignore: {scandir_seconds:.3f}s, {len(scandir_files)} files")
+    print(f"speedup: {listdir_seconds / scandir_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import functools
+import time
 from htmlnode import ParentNode
 from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node
@@ -22,40 +24,132 @@ def markdown_to_blocks(markdown):
     return filtered_blocks
 
 
-def block_to_block_type(block):
-    lines = block.split("\n")
+def iter_blocks(lines):
+    """Lazily split an iterable of lines (such as an open file) into blocks.
+
+    Blocks are separated by empty lines as in markdown_to_blocks, except that
+    a fenced code block is kept whole even when it contains blank lines, and
+    blocks that are only whitespace are dropped. Only the current block is
+    held in memory.
+    """
+    block = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("```"):
+            if in_fence:
+                in_fence = False
+            elif not block and "```" not in line[3:]:
+                # Only a bare opener starts a fence; "```x```" is inline code.
+                in_fence = True
+        if line == "" and not in_fence:
+            if block:
+                text = "\n".join(block).strip()
+                if text != "":
+                    yield text
+                block = []
+            continue
+        block.append(line)
+    if block:
+        text = "\n".join(block).strip()
+        if text != "":
+            yield text
+
+
+def iter_blocks_bytes(buf, encoding="utf-8"):
+    """iter_blocks for a bytes-like buffer such as an mmap of the source.
+
+    Block boundaries are found on the raw bytes and only one block at a time
+    is decoded, so the document is never held as a whole str. The buffer must
+    use "\n" line endings.
+    """
+    size = len(buf)
+    position = 0
+    while position < size:
+        while position < size and buf[position] == 10:
+            position += 1
+        if position >= size:
+            break
+        end = position
+        if buf[position : position + 3] == b"```":
+            eol = buf.find(b"\n", position)
+            if eol == -1:
+                eol = size
+            # As in iter_blocks, only a bare opener starts a fence.
+            if buf.find(b"```", position + 3, eol) == -1:
+                close = buf.find(b"\n```", eol)
+                end = size if close == -1 else close + 1
+        stop = buf.find(b"\n\n", end)
+        if stop == -1:
+            stop = size
+        text = buf[position:stop].decode(encoding).strip()
+        if text != "":
+            yield text
+        position = stop
+
+
+def find_title_bytes(buf, encoding="utf-8"):
+    """Return the text of the first `# ` line in the buffer, or None."""
+    if buf[:2] == b"# ":
+        start = 2
+    else:
+        start = buf.find(b"\n# ")
+        if start == -1:
+            return None
+        start += 3
+    end = buf.find(b"\n", start)
+    if end == -1:
+        end = len(buf)
+    return buf[start:end].decode(encoding)
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return block_type_heading
+
+heading_prefixes = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+
+# Block types recognised by a prefix that every line must share.
+line_prefix_types = (
+    (">", block_type_quote),
+    ("* ", block_type_ulist),
+    ("- ", block_type_ulist),
+)
+
+
+def classify_block(block):
+    """Return the block's type together with its lines.
+
+    The block is split once and each line is inspected at most once: the
+    first line decides which single kind of block is possible, and only that
+    kind is checked against the remaining lines. The lines are handed on to
+    the block's handler so it does not have to split the block again.
+    """
+    if block.startswith(heading_prefixes):
+        return block_type_heading, None
+    lines = block.split("\n")
     if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
-        return block_type_code
-    if block.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return block_type_paragraph
-        return block_type_quote
-    if block.startswith("* "):
-        for line in lines:
-            if not line.startswith("* "):
-                return block_type_paragraph
-        return block_type_ulist
-    if block.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return block_type_paragraph
-        return block_type_ulist
+        return block_type_code, lines
+    for prefix, block_type in line_prefix_types:
+        if block.startswith(prefix):
+            for line in lines:
+                if not line.startswith(prefix):
+                    return block_type_paragraph, lines
+            return block_type, lines
     if block.startswith("1. "):
-        i = 1
-        for line in lines:
+        for i, line in enumerate(lines, 1):
             if not line.startswith(f"{i}. "):
-                return block_type_paragraph
-            i += 1
-        return block_type_olist
-    return block_type_paragraph
+                return block_type_paragraph, lines
+        return block_type_olist, lines
+    return block_type_paragraph, lines
+
+
+def block_to_block_type(block):
+    return classify_block(block)[0]
 
 
 def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
+    return blocks_to_html_node(blocks)
+
+
+def blocks_to_html_node(blocks):
     children = []
     for block in blocks:
         html_node = block_to_html_node(block)
@@ -63,24 +157,74 @@ def markdown_to_html_node(markdown):
     return ParentNode("div", children, None)
 
 
+def iter_blocks_html(html_nodes):
+    # Same markup as blocks_to_html_node(...).iter_html(), but each block's
+    # node can be dropped as soon as it has been serialized.
+    yield "<div>"
+    for html_node in html_nodes:
+        yield from html_node.iter_html()
+    yield "</div>"
+
+
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == block_type_paragraph:
-        return paragraph_to_html_node(block)
-    if block_type == block_type_heading:
-        return heading_to_html_node(block)
-    if block_type == block_type_code:
-        return code_to_html_node(block)
-    if block_type == block_type_olist:
-        return olist_to_html_node(block)
-    if block_type == block_type_ulist:
-        return ulist_to_html_node(block)
-    if block_type == block_type_quote:
-        return quote_to_html_node(block)
-    raise ValueError("Invalid block type")
+    block_type, lines = classify_block(block)
+    handler = block_handlers.get(block_type)
+    if handler is None:
+        raise ValueError("Invalid block type")
+    return handler(block, lines)
+
+
+# Set to a PageTimer by build instrumentation while a page is being profiled,
+# so that inline parsing can be reported separately from block parsing.
+inline_timer = None
+
+# Optional bounded LRU memo of inline parsing, see enable_inline_cache.
+inline_cache = None
+
+
+def enable_inline_cache(maxsize):
+    """Memoize the parsed nodes of up to maxsize distinct inline fragments.
+
+    Shared callouts, link lists and footers recur across many pages; with the
+    cache on they are tokenized once. Cached LeafNodes are shared between
+    trees, so they must not be mutated after parsing.
+    """
+    global inline_cache
+    inline_cache = functools.lru_cache(maxsize=maxsize)(inline_text_to_node_tuple)
+
+
+def disable_inline_cache():
+    global inline_cache
+    inline_cache = None
+
+
+def inline_cache_counts():
+    if inline_cache is None:
+        return 0, 0
+    info = inline_cache.cache_info()
+    return info.hits, info.misses
 
 
 def text_to_children(text):
+    if inline_timer is not None:
+        start = time.perf_counter()
+        children = parse_inline(text)
+        inline_timer.add("inline", time.perf_counter() - start)
+        return children
+    return parse_inline(text)
+
+
+def parse_inline(text):
+    if inline_cache is not None:
+        return list(inline_cache(text))
+    return inline_text_to_children(text)
+
+
+def inline_text_to_node_tuple(text):
+    return tuple(inline_text_to_children(text))
+
+
+def inline_text_to_children(text):
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
@@ -89,14 +233,15 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
+def paragraph_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     paragraph = " ".join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, lines=None):
     level = 0
     for char in block:
         if char == "#":
@@ -110,7 +255,7 @@ def heading_to_html_node(block):
     return ParentNode(f"h{level}", children)
 
 
-def code_to_html_node(block):
+def code_to_html_node(block, lines=None):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("Invalid code block")
     text = block[4:-3]
@@ -119,8 +264,8 @@ def code_to_html_node(block):
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def olist_to_html_node(block, lines=None):
+    items = lines if lines is not None else block.split("\n")
     html_items = []
     for item in items:
         text = item[3:]
@@ -129,8 +274,8 @@ def olist_to_html_node(block):
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(block, lines=None):
+    items = lines if lines is not None else block.split("\n")
     html_items = []
     for item in items:
         text = item[2:]
@@ -139,8 +284,9 @@ def ulist_to_html_node(block):
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
@@ -149,3 +295,13 @@ def quote_to_html_node(block):
     content = " ".join(new_lines)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
+
+
+block_handlers = {
+    block_type_paragraph: paragraph_to_html_node,
+    block_type_heading: heading_to_html_node,
+    block_type_code: code_to_html_node,
+    block_type_olist: olist_to_html_node,
+    block_type_ulist: ulist_to_html_node,
+    block_type_quote: quote_to_html_node,
+}
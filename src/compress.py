@@ -0,0 +1,112 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from manifest import hash_file, load_manifest, save_manifest
+from walk import default_ignore, walk_files
+
+compressible_suffixes = (".html", ".css", ".js", ".xml", ".json")
+
+# A .gz sibling is only kept when the file is at least min_size bytes and
+# compresses to at most max_ratio of its size; below that the saving is
+# lost in headers and the extra file.
+min_size = 256
+max_ratio = 0.9
+
+
+def compress_file(path, level):
+    """Write path + ".gz" when compressing path pays off, removing any stale
+    sibling otherwise. The gzip header carries no name or mtime, so the same
+    content always gives the same bytes. Returns the compressed size, or
+    None when no sibling was kept."""
+    with open(path, "rb") as f:
+        data = f.read()
+    gz_path = path + ".gz"
+    compressed = gzip.compress(data, compresslevel=level, mtime=0) if len(data) >= min_size else None
+    if compressed is None or len(compressed) > len(data) * max_ratio:
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+        return None
+    tmp_path = f"{gz_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(compressed)
+    os.replace(tmp_path, gz_path)
+    return len(compressed)
+
+
+def _compress_job(job):
+    rel_path, path, level = job
+    return rel_path, compress_file(path, level)
+
+
+def precompress(dest_dir_path, manifest_path, workers=1, level=9, ignore=default_ignore):
+    """Give every text output in dest_dir_path a gzip sibling (page.html.gz)
+    for servers that send precompressed files as-is.
+
+    Files are compressed across a pool of worker processes. A file whose
+    size and mtime match the manifest's "compressed" section is skipped
+    without reading it; one whose bytes hash the same as last time is
+    skipped without compressing it. Siblings of outputs that are gone are
+    removed. Prints and returns the totals as
+    (compressed, unchanged, not worth it, bytes, compressed bytes)."""
+    manifest = load_manifest(manifest_path)
+    old_entries = manifest["compressed"]
+    entries = {}
+    jobs = []
+    unchanged = 0
+
+    for rel_path in walk_files(dest_dir_path, ignore):
+        if not rel_path.endswith(compressible_suffixes):
+            continue
+        path = os.path.join(dest_dir_path, rel_path)
+        stat = os.stat(path)
+        entry = old_entries.get(rel_path)
+        sibling_ok = entry is not None and (entry["gz_size"] is None or os.path.exists(path + ".gz"))
+        if sibling_ok and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            entries[rel_path] = entry
+            unchanged += 1
+            continue
+        content_hash = hash_file(path)
+        entry_stat = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": content_hash}
+        if sibling_ok and entry["hash"] == content_hash:
+            entries[rel_path] = dict(entry, **entry_stat)
+            unchanged += 1
+            continue
+        entries[rel_path] = dict(entry_stat, gz_size=None)
+        jobs.append((rel_path, path, level))
+
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        results = map(_compress_job, jobs)
+        _record_results(entries, results)
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            _record_results(entries, executor.map(_compress_job, jobs, chunksize=chunksize))
+
+    for rel_path in old_entries:
+        gz_path = os.path.join(dest_dir_path, rel_path) + ".gz"
+        if rel_path not in entries and os.path.exists(gz_path):
+            os.remove(gz_path)
+
+    manifest["compressed"] = entries
+    save_manifest(manifest_path, manifest)
+
+    kept = [entry for entry in entries.values() if entry["gz_size"] is not None]
+    size = sum(entry["size"] for entry in kept)
+    gz_size = sum(entry["gz_size"] for entry in kept)
+    skipped = len(entries) - len(kept)
+    print(
+        f"Precompressed {len(jobs)} file(s), {unchanged} unchanged; "
+        f"{len(kept)} .gz sibling(s), {skipped} file(s) not worth compressing"
+    )
+    if size:
+        print(f"gzip: {size} -> {gz_size} bytes, {size - gz_size} saved ({(size - gz_size) / size:.1%})")
+    return len(jobs), unchanged, skipped, size, gz_size
+
+
+def _record_results(entries, results):
+    for rel_path, gz_size in results:
+        entries[rel_path]["gz_size"] = gz_size
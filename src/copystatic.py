@@ -1,16 +1,103 @@
 import os
 import shutil
+from manifest import hash_file, load_manifest, save_manifest, remove_output
+from walk import default_ignore, walk_files
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
+link_modes = ("copy", "hardlink", "reflink")
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
+def copy_files_recursive(source_dir_path, dest_dir_path, ignore=default_ignore):
+    os.makedirs(dest_dir_path, exist_ok=True)
+    for rel_path in walk_files(source_dir_path, ignore):
+        from_path = os.path.join(source_dir_path, rel_path)
+        dest_path = os.path.join(dest_dir_path, rel_path)
         print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
-	
\ No newline at end of file
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        shutil.copy(from_path, dest_path)
+
+def sync_files(
+    source_dir_path, dest_dir_path, manifest_path, use_hash=False, link_mode="copy", ignore=default_ignore
+):
+    """Bring dest_dir_path in line with source_dir_path, touching only what
+    changed. A file is considered unchanged when its size and mtime match the
+    existing copy (or, with use_hash, when the contents hash the same). Files
+    synced by a previous run whose source has gone are removed; anything else
+    in dest_dir_path, such as generated pages, is left alone. Returns the
+    relative paths that were copied or removed."""
+    if link_mode not in link_modes:
+        raise ValueError(f"Invalid link mode: {link_mode}")
+    manifest = load_manifest(manifest_path)
+    old_assets = manifest["assets"]
+    new_assets = {}
+    changed = []
+    unchanged = 0
+
+    for rel_path in walk_files(source_dir_path, ignore):
+        from_path = os.path.join(source_dir_path, rel_path)
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        from_stat = os.stat(from_path)
+        new_assets[rel_path] = {"size": from_stat.st_size, "mtime_ns": from_stat.st_mtime_ns}
+        if is_up_to_date(from_path, from_stat, dest_path, use_hash):
+            unchanged += 1
+            continue
+        print(f" * {from_path} -> {dest_path}")
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        place_file(from_path, dest_path, link_mode)
+        changed.append(rel_path)
+
+    removed = []
+    for rel_path in old_assets:
+        if rel_path not in new_assets:
+            remove_output(os.path.join(dest_dir_path, rel_path), dest_dir_path)
+            removed.append(rel_path)
+
+    manifest["assets"] = new_assets
+    save_manifest(manifest_path, manifest)
+    print(f"Copied {len(changed)} static file(s), {unchanged} unchanged, {len(removed)} removed")
+    return changed, removed
+
+def is_up_to_date(from_path, from_stat, dest_path, use_hash):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != from_stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == from_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(from_path) == hash_file(dest_path):
+        # Same bytes, stale mtime: fix the mtime so the next check is cheap.
+        shutil.copystat(from_path, dest_path)
+        return True
+    return False
+
+def place_file(from_path, dest_path, link_mode):
+    if os.path.lexists(dest_path):
+        # Never write through an existing hardlink into the source tree.
+        os.remove(dest_path)
+    if link_mode == "hardlink":
+        try:
+            os.link(from_path, dest_path)
+            return
+        except OSError:
+            pass
+    elif link_mode == "reflink" and hasattr(os, "copy_file_range"):
+        try:
+            clone_file(from_path, dest_path)
+            return
+        except OSError:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+    shutil.copy2(from_path, dest_path)
+
+def clone_file(from_path, dest_path):
+    # copy_file_range lets the kernel share extents (reflink) or copy
+    # server-side where the filesystem supports it, without moving the data
+    # through user space.
+    with open(from_path, "rb") as src, open(dest_path, "wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copystat(from_path, dest_path)
@@ -0,0 +1,90 @@
+import os
+import random
+
+# Each shape describes a synthetic site: how many pages, how many blocks per
+# page, how deep the directory tree goes, and the mix of block kinds.
+shapes = {
+    "small": {"pages": 2000, "blocks": 8, "depth": 2, "mix": {"paragraph": 4, "heading": 1, "list": 2, "quote": 1}},
+    "huge": {"pages": 4, "blocks": 20000, "depth": 1, "mix": {"paragraph": 4, "heading": 1, "list": 2, "quote": 1, "code": 1}},
+    "deep": {"pages": 500, "blocks": 8, "depth": 12, "mix": {"paragraph": 4, "heading": 1, "list": 2}},
+    "links": {"pages": 500, "blocks": 30, "depth": 2, "mix": {"links": 4, "paragraph": 1, "list": 1}},
+    "code": {"pages": 500, "blocks": 30, "depth": 2, "mix": {"code": 4, "paragraph": 1, "heading": 1}},
+}
+
+words = (
+    "the quick brown fox jumps over lazy dog static site generator markdown "
+    "page block inline render template build output content asset image link"
+).split()
+
+
+def sentence(rng, length=12):
+    return " ".join(rng.choice(words) for _ in range(length))
+
+
+def inline_text(rng):
+    parts = [sentence(rng, 6), f"**{sentence(rng, 2)}**", sentence(rng, 4), f"*{sentence(rng, 2)}*"]
+    parts.append(f"`{rng.choice(words)}()`")
+    parts.append(sentence(rng, 5))
+    return " ".join(parts)
+
+
+def link_text(rng):
+    parts = []
+    for i in range(6):
+        parts.append(sentence(rng, 3))
+        if i % 3 == 2:
+            parts.append(f"![{rng.choice(words)} image](/images/{rng.choice(words)}.png)")
+        else:
+            parts.append(f"[{sentence(rng, 2)}](/{rng.choice(words)}/{rng.choice(words)})")
+    return " ".join(parts)
+
+
+def make_block(rng, kind):
+    if kind == "paragraph":
+        return inline_text(rng) + "\n" + inline_text(rng)
+    if kind == "heading":
+        return "#" * rng.randint(2, 4) + " " + sentence(rng, 5)
+    if kind == "list":
+        if rng.random() < 0.5:
+            return "\n".join(f"* {inline_text(rng)}" for _ in range(rng.randint(2, 6)))
+        return "\n".join(f"{i}. {inline_text(rng)}" for i in range(1, rng.randint(3, 7)))
+    if kind == "quote":
+        return "\n".join(f"> {sentence(rng)}" for _ in range(rng.randint(1, 4)))
+    if kind == "code":
+        lines = [f"{rng.choice(words)}_{i} = {rng.choice(words)}({rng.randint(0, 99)})" for i in range(rng.randint(3, 15))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind == "links":
+        return link_text(rng)
+    raise ValueError(f"Invalid block kind: {kind}")
+
+
+def make_page(rng, title, blocks, mix):
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    parts = [f"# {title}"]
+    for kind in rng.choices(kinds, weights, k=blocks):
+        parts.append(make_block(rng, kind))
+    return "\n\n".join(parts) + "\n"
+
+
+def page_dir(root, index, depth):
+    parts = [f"d{(index >> (i * 2)) % 4}" for i in range(depth - 1)]
+    return os.path.join(root, *parts)
+
+
+def write_corpus(dir_path, shape, scale=1.0, seed=0):
+    """Write a deterministic synthetic content tree and return its page count.
+
+    `scale` multiplies the shape's page count so the same shape can be used
+    for quick checks and for large runs."""
+    if shape not in shapes:
+        raise ValueError(f"Invalid corpus shape: {shape}")
+    spec = shapes[shape]
+    rng = random.Random(seed)
+    pages = max(1, int(spec["pages"] * scale))
+    for index in range(pages):
+        out_dir = page_dir(dir_path, index, spec["depth"])
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, f"page{index}.md"), "w") as f:
+            f.write(make_page(rng, f"Page {index}", spec["blocks"], spec["mix"]))
+    return pages
@@ -0,0 +1,118 @@
+import os
+import re
+
+from block_markdown import iter_blocks
+from inline_markdown import extract_markdown_images, extract_markdown_links
+
+# Edge kinds whose target's content ends up in the dependent's output, so a
+# change to the target invalidates the dependent. Links and images only copy
+# the URL text, so editing the page or asset they point at leaves the
+# referring page's output unchanged. (With fingerprinted assets the URL does
+# change; incremental builds compare a page's asset edges against the new
+# fingerprints instead, see gencontent.page_assets_hash.)
+invalidating_kinds = ("template",)
+
+attribute_pattern = re.compile(r"""\b(?:href|src)\s*=\s*["']([^"']+)["']""")
+
+
+class DependencyGraph:
+    """What each page (or template) was built from, keyed by normalized path.
+
+    edges maps a node to {kind: [paths]} with kind one of "template",
+    "page" or "asset". The dict is stored as-is in the build manifest.
+    """
+
+    def __init__(self, edges=None):
+        self.edges = edges if edges is not None else {}
+
+    def record(self, node, dependencies):
+        self.edges[os.path.normpath(node)] = {
+            kind: sorted({os.path.normpath(path) for path in paths})
+            for kind, paths in dependencies.items()
+            if paths
+        }
+
+    def remove(self, node):
+        self.edges.pop(os.path.normpath(node), None)
+
+    def dependents(self):
+        reverse = {}
+        for node, dependencies in self.edges.items():
+            for kind, paths in dependencies.items():
+                for path in paths:
+                    reverse.setdefault(path, []).append((node, kind))
+        return reverse
+
+    def invalidate(self, changed):
+        """Return {node: reason} for every node whose output can differ after
+        the given paths changed: the nodes themselves, and everything that
+        reaches one of them through invalidating edges."""
+        reverse = self.dependents()
+        reasons = {}
+        queue = []
+        for path in sorted(os.path.normpath(path) for path in changed):
+            reasons.setdefault(path, "source changed")
+            queue.append(path)
+        while queue:
+            path = queue.pop()
+            for node, kind in reverse.get(path, ()):
+                if kind in invalidating_kinds and node not in reasons:
+                    reasons[node] = f"{kind} {path} changed"
+                    queue.append(node)
+        return reasons
+
+    def referrers(self, path):
+        """Nodes that reference path, with the kind of each reference."""
+        return sorted(self.dependents().get(os.path.normpath(path), []))
+
+
+def page_dependencies(from_path, template_path, dir_path_content, dir_path_static):
+    with open(from_path, "r") as f:
+        targets = list(link_targets(f))
+    dependencies = resolve_references(targets, dir_path_content, dir_path_static)
+    dependencies["template"] = [template_path]
+    return dependencies
+
+
+def link_targets(lines):
+    """Yield the URLs of the links and images in an iterable of markdown
+    lines. Links are scanned a block at a time, the unit inline markdown is
+    parsed in, so only one block of the page is held in memory."""
+    for block in iter_blocks(lines):
+        for _, url in extract_markdown_links(block):
+            yield url
+        for _, url in extract_markdown_images(block):
+            yield url
+
+
+def template_dependencies(template_path, dir_path_content, dir_path_static):
+    with open(template_path, "r") as f:
+        targets = attribute_pattern.findall(f.read())
+    return resolve_references(targets, dir_path_content, dir_path_static)
+
+
+def resolve_references(targets, dir_path_content, dir_path_static):
+    dependencies = {"page": [], "asset": []}
+    for target in targets:
+        resolved = resolve_reference(target, dir_path_content, dir_path_static)
+        if resolved is not None:
+            kind, path = resolved
+            dependencies[kind].append(path)
+    return dependencies
+
+
+def resolve_reference(target, dir_path_content, dir_path_static):
+    """Map a site-absolute URL to ("asset", static file) or ("page", markdown
+    source). External and relative URLs, and targets that do not exist, map
+    to None."""
+    if not target.startswith("/") or target.startswith("//"):
+        return None
+    path = target.split("#", 1)[0].split("?", 1)[0].strip("/")
+    if path and dir_path_static is not None:
+        static_path = os.path.join(dir_path_static, path)
+        if os.path.isfile(static_path):
+            return "asset", os.path.normpath(static_path)
+    for candidate in (os.path.join(dir_path_content, path, "index.md"), os.path.join(dir_path_content, path + ".md")):
+        if os.path.isfile(candidate):
+            return "page", os.path.normpath(candidate)
+    return None
@@ -0,0 +1,70 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from walk import default_ignore, walk_files
+
+
+def snapshot(paths, ignore=default_ignore):
+    """Map every file under the given files/directories to (mtime_ns, size),
+    skipping ignored files so editor swap files do not trigger rebuilds."""
+    files = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        if not os.path.isdir(path):
+            continue
+        for rel_path in walk_files(path, ignore):
+            file_path = os.path.normpath(os.path.join(path, rel_path))
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            files[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def diff_snapshots(old, new):
+    changed = {path for path, state in new.items() if old.get(path) != state}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+
+def start_server(dir_path_public, port):
+    handler = functools.partial(QuietHandler, directory=dir_path_public)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def watch(paths, rebuild, interval=0.2, ignore=default_ignore):
+    """Poll paths forever, calling rebuild(changed_paths) after each change.
+
+    Polling rather than OS notifications keeps this working on every
+    platform and filesystem. Each rebuild's latency, measured from when the
+    change was noticed, is printed so edit-to-preview time can be tracked.
+    """
+    state = snapshot(paths, ignore)
+    while True:
+        time.sleep(interval)
+        new_state = snapshot(paths, ignore)
+        changed = diff_snapshots(state, new_state)
+        state = new_state
+        if not changed:
+            continue
+        start = time.perf_counter()
+        try:
+            rebuild(changed)
+        except Exception as e:
+            print(f"Error: {e}")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Rebuilt {len(changed)} changed path(s) in {elapsed:.1f} ms")
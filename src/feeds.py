@@ -0,0 +1,167 @@
+import json
+import os
+import time
+from email.utils import formatdate
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+from output import write_output
+from search import page_url
+
+# Most URLs one sitemap file may list; larger sites get a sitemap index.
+sitemap_limit = 50_000
+
+
+class SiteFeeds:
+    """Per-page metadata kept between builds, written out as sitemap.xml,
+    an Atom feed (atom.xml) and an RSS feed (rss.xml).
+
+    The store at store_path maps each page's source path to its URL, title
+    and source mtime, so a build only records the pages it regenerates and
+    never re-reads the others. The files are streamed entry by entry from
+    the store and, like pages, left untouched when their content did not
+    change. Feeds list the feed_size most recently modified pages. The Atom
+    feed's author is author, or the site title when it is not given.
+    """
+
+    def __init__(self, store_path, dest_dir_path, site_url, feed_size=20, author=None):
+        self.store_path = store_path
+        self.dest_dir_path = dest_dir_path
+        self.site_url = site_url.rstrip("/")
+        self.feed_size = feed_size
+        self.store = {"pages": {}, "files": {}}
+        if os.path.exists(store_path):
+            with open(store_path, "r") as f:
+                try:
+                    self.store = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Warning: ignoring unreadable feed metadata {store_path}")
+        self.pages = self.store["pages"]
+        self.author = author
+        # New settings change the files even when no page did.
+        settings = {"site_url": self.site_url, "feed_size": feed_size, "author": author}
+        self.changed = any(self.store.get(key) != value for key, value in settings.items())
+        self.store.update(settings)
+        self.written = 0
+        self.skipped = 0
+
+    def add(self, from_path, dest_path, title, mtime):
+        entry = [page_url(dest_path, self.dest_dir_path), title, int(mtime)]
+        if self.pages.get(from_path) != entry:
+            self.pages[from_path] = entry
+            self.changed = True
+
+    def retain(self, from_paths):
+        keep = set(from_paths)
+        for from_path in [p for p in self.pages if p not in keep]:
+            del self.pages[from_path]
+            self.changed = True
+
+    def absolute_url(self, url):
+        return self.site_url + quote(url)
+
+    def write(self):
+        old_files = self.store["files"]
+        if not self.changed and all(os.path.exists(self.path(f)) for f in old_files):
+            self.skipped += len(old_files)
+            return
+        entries = sorted(self.pages.values())
+        outputs = {}
+        if len(entries) <= sitemap_limit:
+            outputs["sitemap.xml"] = lambda fp: self.write_sitemap(fp, entries)
+        else:
+            parts = []
+            for start in range(0, len(entries), sitemap_limit):
+                filename = f"sitemap-{start // sitemap_limit + 1}.xml"
+                part = entries[start : start + sitemap_limit]
+                outputs[filename] = lambda fp, part=part: self.write_sitemap(fp, part)
+                parts.append(filename)
+            outputs["sitemap.xml"] = lambda fp: self.write_sitemap_index(fp, parts)
+        recent = sorted(entries, key=lambda entry: (-entry[2], entry[0]))[: self.feed_size]
+        outputs["atom.xml"] = lambda fp: self.write_atom(fp, recent)
+        outputs["rss.xml"] = lambda fp: self.write_rss(fp, recent)
+
+        files = {}
+        for filename, write in outputs.items():
+            output_hash, written = write_output(self.path(filename), write, old_files.get(filename))
+            files[filename] = output_hash
+            if written:
+                self.written += 1
+            else:
+                self.skipped += 1
+        for filename in old_files:
+            if filename not in files and os.path.exists(self.path(filename)):
+                os.remove(self.path(filename))
+        self.store["files"] = files
+        self.changed = False
+
+    def path(self, filename):
+        return os.path.join(self.dest_dir_path, filename)
+
+    def write_sitemap(self, fp, entries):
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fp.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for url, _, mtime in entries:
+            fp.write(f"<url><loc>{escape(self.absolute_url(url))}</loc><lastmod>{w3c_date(mtime)}</lastmod></url>\n")
+        fp.write("</urlset>\n")
+
+    def write_sitemap_index(self, fp, filenames):
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fp.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for filename in filenames:
+            fp.write(f"<sitemap><loc>{escape(self.absolute_url('/' + filename))}</loc></sitemap>\n")
+        fp.write("</sitemapindex>\n")
+
+    def write_atom(self, fp, entries):
+        updated = w3c_date(entries[0][2]) if entries else w3c_date(0)
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fp.write('<feed xmlns="http://www.w3.org/2005/Atom">\n')
+        fp.write(f"<title>{escape(self.site_title())}</title>\n")
+        fp.write(f"<id>{escape(self.absolute_url('/'))}</id>\n")
+        fp.write(f"<link href={quoteattr(self.absolute_url('/'))}/>\n")
+        fp.write(f'<link rel="self" href={quoteattr(self.absolute_url("/atom.xml"))}/>\n')
+        fp.write(f"<updated>{updated}</updated>\n")
+        fp.write(f"<author><name>{escape(self.author or self.site_title())}</name></author>\n")
+        for url, title, mtime in entries:
+            link = self.absolute_url(url)
+            fp.write(
+                f"<entry><title>{escape(title)}</title><id>{escape(link)}</id>"
+                f"<link href={quoteattr(link)}/><updated>{w3c_date(mtime)}</updated></entry>\n"
+            )
+        fp.write("</feed>\n")
+
+    def write_rss(self, fp, entries):
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fp.write('<rss version="2.0">\n<channel>\n')
+        fp.write(f"<title>{escape(self.site_title())}</title>\n")
+        fp.write(f"<link>{escape(self.absolute_url('/'))}</link>\n")
+        fp.write(f"<description>{escape(self.site_title())}</description>\n")
+        for url, title, mtime in entries:
+            link = escape(self.absolute_url(url))
+            fp.write(
+                f"<item><title>{escape(title)}</title><link>{link}</link><guid>{link}</guid>"
+                f"<pubDate>{formatdate(mtime, usegmt=True)}</pubDate></item>\n"
+            )
+        fp.write("</channel>\n</rss>\n")
+
+    def site_title(self):
+        for url, title, _ in self.pages.values():
+            if url == "/":
+                return title
+        return self.site_url
+
+    def save(self):
+        dir_path = os.path.dirname(self.store_path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = self.store_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(self.store, separators=(",", ":")))
+        os.replace(tmp_path, self.store_path)
+
+    def summary(self):
+        return f"Sitemap and feeds: {len(self.pages)} page(s); {self.written} file(s) written, {self.skipped} unchanged"
+
+
+def w3c_date(mtime):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(mtime))
@@ -1,40 +1,628 @@
+import asyncio
+import hashlib
+import io
+import mmap
 import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
-from block_markdown import markdown_to_html_node
+import block_markdown
+from block_markdown import (
+    block_to_html_node,
+    blocks_to_html_node,
+    disable_inline_cache,
+    enable_inline_cache,
+    find_title_bytes,
+    inline_cache_counts,
+    iter_blocks,
+    iter_blocks_bytes,
+    iter_blocks_html,
+)
+from depgraph import DependencyGraph, page_dependencies, template_dependencies
+from instrument import PageTimer
+from manifest import hash_file, load_manifest, save_manifest, page_entry, remove_output
+from output import OutputLog, write_output
+from search import TermCollector
+import textnode
+from template import load_template
+from treecache import iter_file_chunks
+from walk import default_ignore, walk_files
+
+# Sources at least this large are parsed from a memory map instead of being
+# read through a text file object.
+mmap_threshold = 1 << 20
+
+# What building one page reports back to _report_results: an error message,
+# or the profile record, inline cache (hits, misses), tree cache hit,
+# (output hash, written), title and search term counts, each None when the
+# build did not produce it.
+PageResult = namedtuple(
+    "PageResult",
+    ("error", "record", "cache_counts", "tree_hit", "output", "title", "counts"),
+    defaults=(None,) * 7,
+)
+
+class BuildError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        lines = [f"{len(failures)} page(s) failed to build:"]
+        for from_path, message in failures:
+            lines.append(f" * {from_path}: {message}")
+        super().__init__("\n".join(lines))
+
 
 def generate_page(from_path, template_path, dest_path):
     print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
-
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
-
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
-
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path)
+    render_page(from_path, load_template(template_path), dest_path)
+
+def render_page(from_path, template, dest_path, tree_cache=None, known_hash=None, terms=None):
+    """Stream a markdown file into dest_path through the template.
+
+    The source is read line by line and converted block by block. Blocks are
+    only buffered until the title has been seen; after that each block is
+    written out as soon as it is parsed, so memory does not grow with the
+    size of the document.
+
+    With a TreeCache, a page whose source was rendered before is written
+    straight from the cached body without parsing, and a miss stores the
+    body as it streams past.
+
+    Sources of at least mmap_threshold bytes are memory-mapped and split into
+    blocks on the raw bytes, decoding one block at a time.
+
+    The page is written atomically and skipped when its hash equals
+    known_hash (see write_output). Returns the output hash, whether the file
+    was written, whether the tree cache was hit (None when there is no
+    cache) and the page title.
+
+    With a TermCollector as terms, the body's terms are collected from the
+    stream for the search index."""
+    key = None
+    if tree_cache is not None:
+        key = tree_cache.key(from_path)
+        entry = tree_cache.open_entry(key)
+        if entry is not None:
+            title, body = entry
+            with body:
+                content = iter_file_chunks(body)
+                if terms is not None:
+                    content = terms.tee(content)
+                output_hash, written = write_page(template, dest_path, title, content, known_hash)
+            return output_hash, written, True, title
+
+    size = os.path.getsize(from_path)
+    if size > 0 and size >= mmap_threshold:
+        with open(from_path, "rb") as from_file:
+            with mmap.mmap(from_file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                # Universal newlines are only applied on the line path.
+                if source.find(b"\r") == -1:
+                    title, content = parse_page_bytes(source)
+                    return _write_parsed(template, dest_path, title, content, tree_cache, key, known_hash, terms)
+
+    with open(from_path, "r") as from_file:
+        title, content = parse_page(from_file)
+        return _write_parsed(template, dest_path, title, content, tree_cache, key, known_hash, terms)
+
+def _write_parsed(template, dest_path, title, content, tree_cache, key, known_hash, terms=None):
+    if terms is not None:
+        content = terms.tee(content)
+    if tree_cache is None:
+        return (*write_page(template, dest_path, title, content, known_hash), None, title)
+    writer = tree_cache.writer(key, title)
+    try:
+        output_hash, written = write_page(template, dest_path, title, writer.tee(content), known_hash)
+    except Exception:
+        writer.abort()
+        raise
+    writer.commit()
+    return output_hash, written, False, title
+
+def parse_page(lines):
+    """Return the title and a lazy stream of body HTML chunks for an
+    iterable of markdown lines. Blocks are only parsed ahead of the stream
+    until the title has been found."""
+    lines = TitleScanner(lines)
+    html_nodes = map(block_to_html_node, iter_blocks(lines))
+    parsed = []
+    for html_node in html_nodes:
+        parsed.append(html_node)
+        if lines.title is not None:
+            break
+    if lines.title is None:
+        raise Exception("No title found")
+    return lines.title, iter_blocks_html(chain(parsed, html_nodes))
+
+def parse_page_bytes(source):
+    """parse_page for a bytes-like buffer, such as an mmap of the source."""
+    title = find_title_bytes(source)
+    if title is None:
+        raise Exception("No title found")
+    return title, iter_blocks_html(map(block_to_html_node, iter_blocks_bytes(source)))
+
+def write_page(template, dest_path, title, content, known_hash=None):
+    return write_output(dest_path, lambda fp: template.write(fp, {"Title": title, "Content": content}), known_hash)
+
+def render_page_profiled(from_path, template, dest_path, timer, known_hash=None, terms=None):
+    """render_page with every stage timed into a PageTimer. The source is
+    read up front so reading and parsing can be told apart. The tree cache
+    is not consulted, since a hit would leave nothing to measure."""
+    with timer.measure("read", allocs="read"):
+        with open(from_path, "r") as from_file:
+            source_lines = from_file.readlines()
+
+    with timer.measure("blocks", allocs="parse"):
+        lines = TitleScanner(source_lines)
+        block_markdown.inline_timer = timer
+        try:
+            node = blocks_to_html_node(iter_blocks(lines))
+        finally:
+            block_markdown.inline_timer = None
+        if lines.title is None:
+            raise Exception("No title found")
+    timer.seconds["blocks"] -= timer.seconds["inline"]
+
+    render_seconds = 0.0
+
+    def write(to_file):
+        nonlocal render_seconds
+        content = node.iter_html()
+        if terms is not None:
+            content = terms.tee(content)
+        chunks = template.iter_output({"Title": lines.title, "Content": content})
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            render_seconds += time.perf_counter() - start
+            if chunk is None:
+                break
+            to_file.write(chunk)
+
+    with timer.measure("write", allocs="output"):
+        output_hash, written = write_output(dest_path, write, known_hash)
+    timer.seconds["write"] -= render_seconds
+    timer.add("render", render_seconds)
+    return output_hash, written, lines.title
+
+class TitleScanner:
+    """Pass lines through unchanged, remembering the first `# ` heading line
+    the same way extract_title does."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.title = None
+
+    def __iter__(self):
+        for line in self.lines:
+            if self.title is None and line.startswith("# "):
+                self.title = line[2:].rstrip("\n")
+            yield line
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    workers=1,
+    verbose=True,
+    profile=None,
+    inline_cache=None,
+    tree_cache=None,
+    pipeline=None,
+    outputs=None,
+    ignore=default_ignore,
+    search_index=None,
+    feeds=None,
+    assets=None,
+    minify=False,
+):
+    pages = find_pages(dir_path_content, dest_dir_path, ignore)
+    generate_pages(
+        pages,
+        template_path,
+        workers,
+        verbose,
+        profile,
+        inline_cache,
+        tree_cache,
+        pipeline,
+        outputs,
+        search_index,
+        feeds,
+        assets,
+        minify,
+    )
+    for index in (search_index, feeds):
+        if index is not None:
+            index.retain([from_path for from_path, _ in pages])
+            index.write()
+            index.save()
+            print(index.summary())
+
+def generate_pages(
+    pages,
+    template_path,
+    workers=1,
+    verbose=True,
+    profile=None,
+    inline_cache=None,
+    tree_cache=None,
+    pipeline=None,
+    outputs=None,
+    search_index=None,
+    feeds=None,
+    assets=None,
+    minify=False,
+):
+    """Render every (from_path, dest_path) pair, optionally across a pool of
+    worker processes. Pages are reported in the order given, and failures are
+    collected and raised together as a BuildError once all pages have run.
+    The template is compiled once per build (once per worker process). When
+    a BuildProfile is given, every page is timed stage by stage into it.
+    When a CacheStats is given as inline_cache, inline parsing is memoized
+    (one LRU of inline_cache.maxsize entries per process) and its hits and
+    misses are added to it. When a TreeCache is given, rendered page bodies
+    are reused from and stored into it, with hits and misses counted in
+    tree_cache.stats. When a PipelineStats is given (and the build is serial,
+    unprofiled and uncached), pages go through the asyncio I/O pipeline.
+    When a SearchIndex is given, each rendered page's terms are added to it,
+    and when SiteFeeds are given, each page's URL, title and source mtime.
+    With an AssetMap, references to static files in the template and in
+    page links and images point at their fingerprinted copies. With minify,
+    insignificant whitespace is stripped from pages as they are written."""
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pages))
+    template = load_template(template_path, assets, minify)
+    cache_size = inline_cache.maxsize if inline_cache is not None else None
+    known_hashes = outputs.hashes if outputs is not None else {}
+    collect_terms = search_index is not None
+    initargs = (template, profile is not None, cache_size, tree_cache, known_hashes, collect_terms, assets)
+    caches = (profile, inline_cache, tree_cache, outputs, search_index, feeds)
+    if workers <= 1:
+        _init_worker(*initargs)
+        try:
+            if pipeline is not None and profile is None and tree_cache is None:
+                results = _run_pipeline(pages, template, pipeline, known_hashes, collect_terms)
+            else:
+                results = map(_build_page_job, pages)
+            _report_results(pages, template_path, results, verbose, *caches)
+        finally:
+            disable_inline_cache()
+            textnode.asset_map = None
+        return
+
+    chunksize = max(1, len(pages) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        results = executor.map(_build_page_job, pages, chunksize=chunksize)
+        _report_results(pages, template_path, results, verbose, *caches)
+
+def _run_pipeline(pages, template, stats, known_hashes, collect_terms=False):
+    start = time.perf_counter()
+    results = asyncio.run(_pipeline(pages, template, stats, known_hashes, collect_terms))
+    stats.wall += time.perf_counter() - start
+    stats.pages += len(pages)
+    return results
+
+async def _pipeline(pages, template, stats, known_hashes, collect_terms=False):
+    """Read and write pages on a thread pool while the event loop parses
+    whichever pages have already been read. At most stats.in_flight pages
+    are held in memory (as source text or rendered output) at once."""
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(stats.in_flight)
+
+    async def build(page):
+        from_path, dest_path = page
+        async with slots:
+            try:
+                text, seconds = await loop.run_in_executor(executor, _timed_read, from_path)
+                stats.add("read", seconds)
+                # Parsing runs on the event loop without yielding, so the
+                # inline cache counters only move for this page meanwhile.
+                hits, misses = inline_cache_counts()
+                start = time.perf_counter()
+                # Split on "\n" only, as iterating the open file does;
+                # str.splitlines also breaks on \f, \x85, U+2028 and others.
+                title, content = parse_page(io.StringIO(text))
+                terms = TermCollector() if collect_terms else None
+                if terms is not None:
+                    content = terms.tee(content)
+                output = template.render({"Title": title, "Content": content})
+                stats.add("parse", time.perf_counter() - start)
+                new_hits, new_misses = inline_cache_counts()
+                known_hash = known_hashes.get(str(dest_path))
+                written, seconds = await loop.run_in_executor(
+                    executor, _timed_write, dest_path, output, known_hash
+                )
+                stats.add("write", seconds)
+            except Exception as e:
+                return PageResult(error=f"{type(e).__name__}: {e}")
+        return PageResult(
+            cache_counts=(new_hits - hits, new_misses - misses),
+            output=written,
+            title=title,
+            counts=terms.counts if terms is not None else None,
+        )
+
+    with ThreadPoolExecutor(max_workers=stats.in_flight) as executor:
+        return await asyncio.gather(*(build(page) for page in pages))
+
+def _timed_read(from_path):
+    start = time.perf_counter()
+    with open(from_path, "r") as from_file:
+        text = from_file.read()
+    return text, time.perf_counter() - start
+
+def _timed_write(dest_path, output, known_hash):
+    start = time.perf_counter()
+    output_hash, written = write_output(dest_path, lambda fp: fp.write(output), known_hash)
+    return (output_hash, written), time.perf_counter() - start
+
+_worker_template = None
+_worker_profiled = False
+_worker_tree_cache = None
+_worker_known_hashes = {}
+_worker_collect_terms = False
+
+def _init_worker(
+    template,
+    profiled=False,
+    inline_cache_size=None,
+    tree_cache=None,
+    known_hashes=None,
+    collect_terms=False,
+    assets=None,
+):
+    global _worker_template, _worker_profiled, _worker_tree_cache, _worker_known_hashes, _worker_collect_terms
+    _worker_template = template
+    _worker_profiled = profiled
+    _worker_tree_cache = tree_cache
+    _worker_known_hashes = known_hashes if known_hashes is not None else {}
+    _worker_collect_terms = collect_terms
+    textnode.asset_map = assets
+    if inline_cache_size is not None:
+        enable_inline_cache(inline_cache_size)
+    else:
+        disable_inline_cache()
+
+def _build_page_job(page):
+    from_path, dest_path = page
+    timer = PageTimer(from_path) if _worker_profiled else None
+    hits, misses = inline_cache_counts()
+    known_hash = _worker_known_hashes.get(str(dest_path))
+    tree_hit = None
+    terms = TermCollector() if _worker_collect_terms else None
+    try:
+        if timer is None:
+            output_hash, written, tree_hit, title = render_page(
+                from_path, _worker_template, dest_path, _worker_tree_cache, known_hash, terms
+            )
         else:
-            generate_pages_recursive(from_path, template_path, dest_path)
-        
+            output_hash, written, title = render_page_profiled(
+                from_path, _worker_template, dest_path, timer, known_hash, terms
+            )
+    except Exception as e:
+        return PageResult(error=f"{type(e).__name__}: {e}")
+    new_hits, new_misses = inline_cache_counts()
+    return PageResult(
+        record=timer.to_record() if timer is not None else None,
+        cache_counts=(new_hits - hits, new_misses - misses),
+        tree_hit=tree_hit,
+        output=(output_hash, written),
+        title=title,
+        counts=terms.counts if terms is not None else None,
+    )
+
+def _report_results(
+    pages,
+    template_path,
+    results,
+    verbose,
+    profile=None,
+    inline_cache=None,
+    tree_cache=None,
+    outputs=None,
+    search_index=None,
+    feeds=None,
+):
+    failures = []
+    for (from_path, dest_path), result in zip(pages, results):
+        if verbose:
+            print(f" * {from_path} {template_path} -> {dest_path}")
+        if result.error is not None:
+            failures.append((from_path, result.error))
+            continue
+        if profile is not None:
+            profile.add(result.record)
+        if inline_cache is not None:
+            inline_cache.add(*result.cache_counts)
+        if tree_cache is not None and result.tree_hit is not None:
+            tree_cache.stats.add(int(result.tree_hit), int(not result.tree_hit))
+        if outputs is not None:
+            outputs.add(dest_path, *result.output)
+        if search_index is not None:
+            search_index.add(from_path, dest_path, result.title, result.counts)
+        if feeds is not None:
+            feeds.add(from_path, dest_path, result.title, os.path.getmtime(from_path))
+    if failures:
+        raise BuildError(failures)
+
+def find_pages(dir_path_content, dest_dir_path, ignore=default_ignore):
+    pages = []
+    for rel_path in walk_files(dir_path_content, ignore):
+        from_path = os.path.join(dir_path_content, rel_path)
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        pages.append((from_path, Path(dest_path).with_suffix(".html")))
+    return pages
+
+def generate_pages_incremental(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest_path,
+    workers=1,
+    changed=None,
+    profile=None,
+    inline_cache=None,
+    tree_cache=None,
+    pipeline=None,
+    dir_path_static=None,
+    explain=False,
+    ignore=default_ignore,
+    search_index=None,
+    feeds=None,
+    assets=None,
+    minify=False,
+):
+    """Regenerate only the pages whose manifest entry no longer matches.
+
+    When the caller already knows which paths changed (the watcher does),
+    pass them as `changed`: the dependency graph recorded by earlier builds
+    picks out the pages those changes can affect, and every other page is
+    trusted from the manifest instead of being re-hashed. With explain, the
+    reasons each page is rebuilt are printed. With a SearchIndex, rebuilt
+    pages are re-indexed and every other page keeps its stored term list;
+    SiteFeeds likewise keep the metadata of pages that are not rebuilt.
+    With an AssetMap, a page is also rebuilt when a static file it (or the
+    template) references gets a new fingerprint. Turning minify on or off
+    counts as a template change."""
+    manifest = load_manifest(manifest_path)
+    old_pages = manifest["pages"]
+    new_pages = {}
+    template_hash = hash_template(template_path, assets, minify)
+    graph = DependencyGraph(manifest["graph"])
+    outputs = OutputLog(manifest["outputs"])
+    stale = []
+    reasons = {}
+    affected = graph.invalidate(changed) if changed is not None else None
+
+    for from_path, dest_path in find_pages(dir_path_content, dest_dir_path, ignore):
+        old_entry = old_pages.get(from_path)
+        if affected is not None and old_entry is not None and os.path.normpath(from_path) not in affected:
+            source_hash = old_entry["source_hash"]
+        else:
+            source_hash = hash_file(from_path)
+        entry = page_entry(source_hash, template_hash, dest_path, page_assets_hash(graph, from_path, assets))
+        page_reasons = stale_reasons(old_entry, entry)
+        if not os.path.exists(dest_path):
+            page_reasons.append("output missing")
+        if search_index is not None and from_path not in search_index.store["pages"]:
+            page_reasons.append("not indexed")
+        if feeds is not None and from_path not in feeds.pages:
+            page_reasons.append("not in feeds")
+        if page_reasons:
+            stale.append((from_path, dest_path))
+            reasons[from_path] = page_reasons
+        new_pages[from_path] = entry
+    unchanged = len(new_pages) - len(stale)
+    if explain:
+        for from_path, _ in stale:
+            print(f" * rebuilding {from_path}: {', '.join(reasons[from_path])}")
+
+    failures = []
+    try:
+        generate_pages(
+            stale,
+            template_path,
+            workers,
+            profile=profile,
+            inline_cache=inline_cache,
+            tree_cache=tree_cache,
+            pipeline=pipeline,
+            outputs=outputs,
+            search_index=search_index,
+            feeds=feeds,
+            assets=assets,
+            minify=minify,
+        )
+    except BuildError as e:
+        failures = e.failures
+        # Keep the previous entry (if any) so the failed page is retried on the
+        # next build without its last good output being treated as stale.
+        for from_path, _ in failures:
+            if from_path in old_pages:
+                new_pages[from_path] = old_pages[from_path]
+            else:
+                del new_pages[from_path]
+
+    removed = 0
+    live_outputs = {entry["dest_path"] for entry in new_pages.values()}
+    for from_path, entry in old_pages.items():
+        if from_path in new_pages or entry["dest_path"] in live_outputs:
+            continue
+        remove_output(entry["dest_path"], dest_dir_path)
+        outputs.remove(entry["dest_path"])
+        removed += 1
+
+    # Record what rebuilt pages (and pages the graph has not seen yet) were
+    # built from; failed pages keep the edges of their last good build.
+    failed = {from_path for from_path, _ in failures}
+    for from_path in old_pages:
+        if from_path not in new_pages:
+            graph.remove(from_path)
+    for from_path in new_pages:
+        if from_path in failed:
+            continue
+        if from_path in reasons or os.path.normpath(from_path) not in graph.edges:
+            dependencies = page_dependencies(from_path, template_path, dir_path_content, dir_path_static)
+            graph.record(from_path, dependencies)
+            if assets is not None:
+                new_pages[from_path]["assets_hash"] = page_assets_hash(graph, from_path, assets)
+    graph.record(template_path, template_dependencies(template_path, dir_path_content, dir_path_static))
+
+    manifest["pages"] = new_pages
+    manifest["graph"] = graph.edges
+    manifest["outputs"] = outputs.hashes
+    save_manifest(manifest_path, manifest)
+    for index in (search_index, feeds):
+        if index is not None:
+            index.retain(new_pages)
+            index.write()
+            index.save()
+    generated = len(stale) - len(failures)
+    print(f"Generated {generated} page(s), {unchanged} unchanged, {removed} removed")
+    print(outputs.summary())
+    for index in (search_index, feeds):
+        if index is not None:
+            print(index.summary())
+    if failures:
+        raise BuildError(failures)
+    return generated
+
+def stale_reasons(old_entry, entry):
+    if old_entry is None:
+        return ["new page"]
+    reasons = []
+    if old_entry["source_hash"] != entry["source_hash"]:
+        reasons.append("source changed")
+    if old_entry["template_hash"] != entry["template_hash"]:
+        reasons.append("template changed")
+    if old_entry["dest_path"] != entry["dest_path"]:
+        reasons.append("output path changed")
+    if old_entry.get("assets_hash") != entry.get("assets_hash"):
+        reasons.append("assets changed")
+    return reasons
+
+def hash_template(template_path, assets=None, minify=False):
+    """Hash of the template as pages are rendered with it: after rewriting
+    its asset references, so a new fingerprint counts as a change, and
+    marked when pages are minified."""
+    if assets is None and not minify:
+        return hash_file(template_path)
+    with open(template_path, "r") as f:
+        text = f.read()
+    if assets is not None:
+        text = assets.rewrite_references(text)
+    if minify:
+        text += "\0minify"
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def page_assets_hash(graph, from_path, assets):
+    if assets is None:
+        return None
+    edges = graph.edges.get(os.path.normpath(from_path), {})
+    return assets.digest(edges.get("asset", []))
+
 def extract_title(md):
     lines = md.split("\n")
     for line in lines:
@@ -1,4 +1,8 @@
 class HTMLNode:
+    # Pages produce hundreds of thousands of nodes; slots keep each one free
+    # of a per-instance __dict__.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,6 +12,12 @@ class HTMLNode:
     
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
+
+    def iter_html(self):
+        raise NotImplementedError("iter_html method not implemented")
+
+    def write_html(self, fp):
+        fp.writelines(self.iter_html())
     
     def props_to_html(self):
         if self.props is None:
@@ -22,6 +32,8 @@ class HTMLNode:
     
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -32,22 +44,32 @@ class LeafNode(HTMLNode):
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        # Yields the document as a stream of chunks so it can be written out
+        # without ever materialising the full HTML string.
         if self.tag is None:
             raise ValueError("A tag is required for ParentNode and cannot be None.")
         if self.children is None:
             raise ValueError("Children are required for a ParentNode and cannot be None.")
-        children_html = ""
+        yield f"<{self.tag}{self.props_to_html()}>"
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
     
     def __repr__(self):
         return f"ParentNode({self.tag}, children={self.children}, {self.props})"
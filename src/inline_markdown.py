@@ -10,7 +10,125 @@ from textnode import (
 )
 
 
+delimiter_pattern = re.compile(r"\*\*|\*|`")
+# The image and link syntax, as matched by iter_images and iter_links. The
+# patterns themselves go quadratic on long runs of unmatched brackets, so
+# they are only kept as the reference definition.
+image_pattern = re.compile(r"!\[([\w\s]*?)\]\((.*?)\)")
+link_pattern = re.compile(r"(?<!\!)\[([^\]]*?)\]\((.*?)\)")
+non_word_pattern = re.compile(r"[^\w\s]")
+
+delimiter_text_types = {
+    "**": text_type_bold,
+    "*": text_type_italic,
+    "`": text_type_code,
+}
+
+
 def text_to_textnodes(text):
+    """Tokenize inline markdown in a single left-to-right scan.
+
+    Produces the same nodes as text_to_textnodes_multipass: `**` binds before
+    `*`, which binds before a backtick, so a delimiter of a higher-priority
+    kind inside a span of a lower one ends that span. Images and links are
+    only recognised in plain-text runs between delimiters.
+    """
+    nodes = []
+    open_delimiter = None
+    start = 0
+    for match in delimiter_pattern.finditer(text):
+        delimiter = match.group()
+        if open_delimiter is None:
+            _append_text_run(text[start : match.start()], nodes)
+            open_delimiter = delimiter
+            start = match.end()
+        elif delimiter == open_delimiter:
+            if match.start() > start:
+                nodes.append(TextNode(text[start : match.start()], delimiter_text_types[delimiter]))
+            open_delimiter = None
+            start = match.end()
+        elif open_delimiter == "*" and delimiter == "**" or open_delimiter == "`" and delimiter != "`":
+            _raise_unclosed(open_delimiter)
+    if open_delimiter is not None:
+        _raise_unclosed(open_delimiter)
+    _append_text_run(text[start:], nodes)
+    return nodes
+
+def _raise_unclosed(delimiter):
+    raise ValueError(f"Invalid Markdown Syntax: Missing closing delimiter for '{delimiter}'")
+
+def _append_text_run(text, nodes):
+    if "](" not in text:
+        if text != "":
+            nodes.append(TextNode(text, text_type_text))
+        return
+    position = 0
+    for start, end, alt, url in iter_images(text):
+        _append_links(text[position:start], nodes)
+        nodes.append(TextNode(alt, text_type_image, url))
+        position = end
+    _append_links(text[position:], nodes)
+
+def _append_links(text, nodes):
+    position = 0
+    for start, end, anchor, url in iter_links(text):
+        if start > position:
+            nodes.append(TextNode(text[position:start], text_type_text))
+        nodes.append(TextNode(anchor, text_type_link, url))
+        position = end
+    if position < len(text):
+        nodes.append(TextNode(text[position:], text_type_text))
+
+def iter_images(text):
+    """Yield (start, end, alt, url) for every image_pattern match in text."""
+    return _iter_bracketed(text, "![")
+
+def iter_links(text):
+    """Yield (start, end, anchor, url) for every link_pattern match in text."""
+    return _iter_bracketed(text, "[")
+
+def _iter_bracketed(text, opener):
+    # Every match has "](" right after its text, so the scan visits those
+    # instead of every opening bracket. All starts between the previous "]"
+    # and a "](" share that "](", so at most one start per "](" is checked,
+    # and the next ")" and newline only move forward as the scan does. The
+    # scan is therefore linear however many unmatched brackets there are.
+    image = opener == "!["
+    length = len(text)
+    close_paren = newline = -1
+    position = 0
+    while True:
+        close_bracket = text.find("](", position)
+        if close_bracket == -1:
+            return
+        url_start = close_bracket + 2
+        lowest = text.rfind("]", position, close_bracket) + 1 or position
+        if image:
+            start = text.rfind("![", lowest, close_bracket)
+            if start != -1 and non_word_pattern.search(text, start + 2, close_bracket):
+                start = -1
+        else:
+            start = text.find("[", lowest, close_bracket)
+            while start > 0 and text[start - 1] == "!":
+                start = text.find("[", start + 1, close_bracket)
+        if start == -1:
+            position = url_start - 1
+            continue
+        if close_paren < url_start:
+            close_paren = text.find(")", url_start)
+            if close_paren == -1:
+                return
+        if newline < url_start:
+            newline = text.find("\n", url_start)
+            if newline == -1:
+                newline = length
+        if newline < close_paren:
+            position = url_start - 1
+            continue
+        yield start, close_paren + 1, text[start + len(opener) : close_bracket], text[url_start:close_paren]
+        position = close_paren + 1
+
+def text_to_textnodes_multipass(text):
     nodes = [TextNode(text, text_type_text)]
     nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
     nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
@@ -40,62 +158,33 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != text_type_text:
-            new_nodes.append(old_node)
-            continue
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], text_type_text))
-            new_nodes.append(
-                TextNode(
-                    image[0],
-                    text_type_image,
-                    image[1],
-                )
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, text_type_text))
-    return new_nodes
+    return _split_nodes_bracketed(old_nodes, iter_images, text_type_image)
 
 
 def split_nodes_link(old_nodes):
+    return _split_nodes_bracketed(old_nodes, iter_links, text_type_link)
+
+def _split_nodes_bracketed(old_nodes, iter_matches, text_type):
     new_nodes = []
     for old_node in old_nodes:
-        if old_node.text_type != text_type_text:
+        if old_node.text_type != text_type_text or "](" not in old_node.text:
             new_nodes.append(old_node)
             continue
-        current_text = old_node.text
-        links = extract_markdown_links(current_text)
-        if len(links) == 0:
+        text = old_node.text
+        position = 0
+        for start, end, alt, url in iter_matches(text):
+            if start > position:
+                new_nodes.append(TextNode(text[position:start], text_type_text))
+            new_nodes.append(TextNode(alt, text_type, url))
+            position = end
+        if position == 0:
             new_nodes.append(old_node)
-            continue
-        for link in links:
-            sections = current_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], text_type_text))
-            new_nodes.append(TextNode(link[0], text_type_link, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, text_type_text))
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], text_type_text))
     return new_nodes
 
 def extract_markdown_images(text):
-    image_extracted = re.findall (r"!\[([\w\s]*?)\]\((.*?)\)", text)
-    return image_extracted
+    return [(alt, url) for _, _, alt, url in iter_images(text)]
 
 def extract_markdown_links(text):
-    link_extracted = re.findall (r"(?<!\!)\[([^\]]*?)\]\((.*?)\)", text)
-    return link_extracted
+    return [(anchor, url) for _, _, anchor, url in iter_links(text)]
@@ -0,0 +1,169 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Stages recorded for every page, in pipeline order. "render" covers both
+# serializing the tree and the template segments around it, since the two
+# are interleaved in the same chunk stream.
+stages = ("read", "blocks", "inline", "render", "write")
+
+
+class PageTimer:
+    """Per-stage wall time and net allocated-block counts for one page."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.pid = os.getpid()
+        self.start = time.time()
+        self.seconds = {stage: 0.0 for stage in stages}
+        self.allocs = {}
+
+    def add(self, stage, seconds):
+        self.seconds[stage] += seconds
+
+    @contextmanager
+    def measure(self, stage, allocs=None):
+        # Allocation counts are taken around coarse groups of stages only:
+        # sys.getallocatedblocks() is too slow to call per inline fragment.
+        blocks = sys.getallocatedblocks() if allocs else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - start
+            if allocs:
+                self.allocs[allocs] = self.allocs.get(allocs, 0) + sys.getallocatedblocks() - blocks
+
+    def to_record(self):
+        return {
+            "path": self.path,
+            "pid": self.pid,
+            "start": self.start,
+            "seconds": self.seconds,
+            "allocs": self.allocs,
+        }
+
+
+class BuildProfile:
+    def __init__(self):
+        self.records = []
+
+    def add(self, record):
+        self.records.append(record)
+
+    def summary(self, top=10):
+        if not self.records:
+            return "Build profile: no pages generated"
+        lines = [f"Build profile: {len(self.records)} page(s)"]
+        totals = {stage: sum(r["seconds"][stage] for r in self.records) for stage in stages}
+        overall = sum(totals.values()) or 1.0
+        alloc_groups = sorted({group for r in self.records for group in r["allocs"]})
+        lines.append(f"  {'stage':<8} {'total s':>9} {'share':>7}")
+        for stage in stages:
+            lines.append(f"  {stage:<8} {totals[stage]:>9.4f} {totals[stage] / overall:>6.1%}")
+        for group in alloc_groups:
+            blocks = sum(r["allocs"].get(group, 0) for r in self.records)
+            lines.append(f"  net allocated blocks ({group}): {blocks}")
+
+        page_totals = sorted(page_seconds(r) for r in self.records)
+        percentiles = ", ".join(
+            f"p{p} {percentile(page_totals, p) * 1000:.2f} ms" for p in (50, 90, 99)
+        )
+        lines.append(f"  per page: {percentiles}, max {page_totals[-1] * 1000:.2f} ms")
+
+        lines.append(f"  slowest {min(top, len(self.records))} page(s):")
+        for record in sorted(self.records, key=page_seconds, reverse=True)[:top]:
+            breakdown = " ".join(f"{stage} {record['seconds'][stage] * 1000:.2f}" for stage in stages)
+            lines.append(f"    {page_seconds(record) * 1000:>9.2f} ms  {record['path']}  ({breakdown})")
+        return "\n".join(lines)
+
+    def write_trace(self, trace_path):
+        """Write the records in Chrome trace-event format (chrome://tracing,
+        Perfetto, speedscope): one complete event per page with its stages
+        laid out back to back inside it."""
+        if not self.records:
+            return
+        origin = min(r["start"] for r in self.records)
+        events = []
+        for record in self.records:
+            ts = (record["start"] - origin) * 1e6
+            events.append({
+                "name": record["path"],
+                "cat": "page",
+                "ph": "X",
+                "ts": ts,
+                "dur": page_seconds(record) * 1e6,
+                "pid": record["pid"],
+                "tid": record["pid"],
+                "args": {"allocs": record["allocs"]},
+            })
+            for stage in stages:
+                dur = record["seconds"][stage] * 1e6
+                events.append({
+                    "name": stage,
+                    "cat": "stage",
+                    "ph": "X",
+                    "ts": ts,
+                    "dur": dur,
+                    "pid": record["pid"],
+                    "tid": record["pid"],
+                })
+                ts += dur
+        with open(trace_path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class CacheStats:
+    """Hit/miss counters for a build cache, summed across worker processes."""
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"{self.name}: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), capacity {self.maxsize}"
+
+
+class PipelineStats:
+    """Time spent in each stage of the asyncio I/O pipeline, against the wall
+    time of the whole run. Overlap is how many times faster the pipeline ran
+    than the same stages would back to back."""
+
+    def __init__(self, in_flight):
+        self.in_flight = in_flight
+        self.pages = 0
+        self.seconds = {"read": 0.0, "parse": 0.0, "write": 0.0}
+        self.wall = 0.0
+
+    def add(self, stage, seconds):
+        self.seconds[stage] += seconds
+
+    def summary(self):
+        serial = sum(self.seconds.values())
+        io_seconds = self.seconds["read"] + self.seconds["write"]
+        overlap = serial / self.wall if self.wall else 0.0
+        hidden = (serial - self.wall) / io_seconds if io_seconds else 0.0
+        stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in self.seconds.items())
+        return (
+            f"I/O pipeline: {self.pages} page(s), {self.in_flight} in flight: {stages}, wall {self.wall:.3f}s; "
+            f"overlap {overlap:.2f}x ({max(0.0, min(1.0, hidden)):.1%} of I/O time hidden)"
+        )
+
+
+def page_seconds(record):
+    return sum(record["seconds"].values())
+
+
+def percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -1,34 +1,323 @@
+import argparse
 import os
 import shutil
-from gencontent import generate_pages_recursive
-from copystatic import copy_files_recursive
+import sys
+from assets import fingerprint_files
+from gencontent import BuildError, generate_pages_recursive, generate_pages_incremental
+from compress import precompress
+from copystatic import copy_files_recursive, sync_files, link_modes
+from devserver import start_server, watch
+from instrument import BuildProfile, CacheStats, PipelineStats
+from feeds import SiteFeeds
+from search import SearchIndex
+from treecache import TreeCache
+from walk import default_ignore
 
 dir_path_static = "./static"
 dir_path_public = "./public"
 dir_path_content = "./content"
+dir_path_build = "./.build"
 template_path = "./template.html"
+manifest_path = os.path.join(dir_path_build, "manifest.json")
+dir_path_tree_cache = os.path.join(dir_path_build, "trees")
+search_store_path = os.path.join(dir_path_build, "search.json")
+feeds_store_path = os.path.join(dir_path_build, "feeds.json")
 
 
-def main():
-	print("Deleting public directory...")
-	if os.path.exists(dir_path_public):
-		shutil.rmtree(dir_path_public)
+def parse_args(argv=None):
+	parser = argparse.ArgumentParser(description="Generate the static site into the public directory.")
+	parser.add_argument(
+		"--incremental",
+		action="store_true",
+		help="keep public/ and only regenerate pages and static files that changed",
+	)
+	parser.add_argument(
+		"--workers",
+		type=int,
+		default=1,
+		help="number of processes used to generate pages (0 uses every CPU core)",
+	)
+	parser.add_argument(
+		"--hash-static",
+		action="store_true",
+		help="in incremental mode, compare static files by content when their mtime differs",
+	)
+	parser.add_argument(
+		"--link-mode",
+		choices=link_modes,
+		default="copy",
+		help="how incremental mode places static files in public/ (falls back to copy)",
+	)
+	parser.add_argument(
+		"--profile",
+		action="store_true",
+		help="time every page stage by stage and print a summary with the slowest pages",
+	)
+	parser.add_argument("--profile-top", type=int, default=10, help="number of slowest pages to list")
+	parser.add_argument("--trace", help="write the profile as a Chrome trace JSON file (implies --profile)")
+	parser.add_argument(
+		"--inline-cache",
+		type=int,
+		default=0,
+		metavar="N",
+		help="memoize inline parsing of up to N distinct fragments per process and report hits/misses",
+	)
+	parser.add_argument(
+		"--tree-cache",
+		action="store_true",
+		help="reuse rendered page bodies across builds from a content-addressed cache in .build/trees",
+	)
+	parser.add_argument(
+		"--tree-cache-size",
+		type=int,
+		default=256,
+		metavar="MB",
+		help="size limit for the tree cache; least recently used entries are evicted after each build",
+	)
+	parser.add_argument(
+		"--prune-cache",
+		action="store_true",
+		help="evict least recently used tree cache entries down to --tree-cache-size and exit",
+	)
+	parser.add_argument(
+		"--async-io",
+		type=int,
+		default=0,
+		metavar="N",
+		help="overlap page reads and writes with parsing, keeping up to N pages in flight "
+		"(serial builds without --profile or --tree-cache only)",
+	)
+	parser.add_argument(
+		"--explain",
+		action="store_true",
+		help="in incremental mode, print why each page is rebuilt",
+	)
+	parser.add_argument(
+		"--search-index",
+		action="store_true",
+		help="write a sharded full-text search index to public/search, re-indexing only rebuilt pages",
+	)
+	parser.add_argument(
+		"--fingerprint",
+		action="store_true",
+		help="also write content-hashed copies of static files (index.3f9a1c2b.css) and point the template, "
+		"links and images at them",
+	)
+	parser.add_argument(
+		"--minify",
+		action="store_true",
+		help="collapse insignificant whitespace in generated pages, leaving <pre> and <code> content untouched",
+	)
+	parser.add_argument(
+		"--precompress",
+		action="store_true",
+		help="write .gz siblings of the .html, .css, .js, .xml and .json files in public/",
+	)
+	parser.add_argument(
+		"--compress-workers",
+		type=int,
+		default=0,
+		help="number of processes used by --precompress (default 0 uses every CPU core)",
+	)
+	parser.add_argument(
+		"--compress-level",
+		type=int,
+		choices=range(1, 10),
+		default=9,
+		metavar="1-9",
+		help="gzip level for --precompress; the cost is paid once per changed file, so the default is the maximum",
+	)
+	parser.add_argument(
+		"--site-url",
+		metavar="URL",
+		help="write sitemap.xml, atom.xml and rss.xml to public/ with links under URL",
+	)
+	parser.add_argument("--feed-size", type=int, default=20, help="number of most recently changed pages in the feeds")
+	parser.add_argument("--feed-author", metavar="NAME", help="author named in the Atom feed (default: the site title)")
+	parser.add_argument(
+		"--ignore",
+		action="append",
+		default=[],
+		metavar="GLOB",
+		help="skip matching files and directories in content/ and static/ (repeatable; "
+		"patterns with a / match the relative path, others the name)",
+	)
+	parser.add_argument(
+		"--watch",
+		action="store_true",
+		help="serve public/ and rebuild affected pages and static files on every change (implies --incremental)",
+	)
+	parser.add_argument("--port", type=int, default=8888, help="port for the --watch dev server")
+	args = parser.parse_args(argv)
+	if args.watch:
+		args.incremental = True
+	if args.trace:
+		args.profile = True
+	args.ignore = default_ignore + tuple(args.ignore)
+	return args
+
+
+def make_tree_cache(args, assets=None):
+	return TreeCache(dir_path_tree_cache, args.tree_cache_size * 1024 * 1024, assets=assets)
+
+
+def make_assets(args):
+	if not args.fingerprint:
+		return None
+	return fingerprint_files(dir_path_static, dir_path_public, manifest_path, args.link_mode, args.ignore)
+
+
+def make_search_index(args):
+	return SearchIndex(search_store_path, dir_path_public) if args.search_index else None
+
+
+def make_feeds(args):
+	if not args.site_url:
+		return None
+	return SiteFeeds(feeds_store_path, dir_path_public, args.site_url, args.feed_size, args.feed_author)
+
+
+def main(argv=None):
+	args = parse_args(argv)
+
+	if args.prune_cache:
+		removed, freed = make_tree_cache(args).prune()
+		print(f"Pruned {removed} tree cache entries ({freed} bytes)")
+		return 0
+
+	if not args.incremental:
+		print("Deleting public directory...")
+		if os.path.exists(dir_path_public):
+			shutil.rmtree(dir_path_public)
+		if os.path.exists(manifest_path):
+			os.remove(manifest_path)
 
 	print("Copying static files to public directory...")
-	copy_files_recursive(dir_path_static, dir_path_public)
+	if args.incremental:
+		sync_files(dir_path_static, dir_path_public, manifest_path, args.hash_static, args.link_mode, args.ignore)
+	else:
+		copy_files_recursive(dir_path_static, dir_path_public, args.ignore)
+	assets = make_assets(args)
 
 	if not os.path.exists(template_path):
 		print(f"Error: Template file not found at {template_path}")
 		return
-	
+
 	if not os.path.exists(dir_path_content):
 		print(f"Error: Content directory not found at {dir_path_content}")
 		return
-	
+
 	print("Generating page...")
-	generate_pages_recursive(dir_path_content, template_path, dir_path_public)
+	profile = BuildProfile() if args.profile else None
+	inline_cache = CacheStats("Inline cache", args.inline_cache) if args.inline_cache > 0 else None
+	tree_cache = make_tree_cache(args, assets) if args.tree_cache else None
+	pipeline = PipelineStats(args.async_io) if args.async_io > 0 else None
+	search_index = make_search_index(args)
+	feeds = make_feeds(args)
+	try:
+		if args.incremental:
+			generate_pages_incremental(
+				dir_path_content,
+				template_path,
+				dir_path_public,
+				manifest_path,
+				args.workers,
+				profile=profile,
+				inline_cache=inline_cache,
+				tree_cache=tree_cache,
+				pipeline=pipeline,
+				dir_path_static=dir_path_static,
+				explain=args.explain,
+				ignore=args.ignore,
+				search_index=search_index,
+				feeds=feeds,
+				assets=assets,
+				minify=args.minify,
+			)
+		else:
+			generate_pages_recursive(
+				dir_path_content,
+				template_path,
+				dir_path_public,
+				args.workers,
+				profile=profile,
+				inline_cache=inline_cache,
+				tree_cache=tree_cache,
+				pipeline=pipeline,
+				ignore=args.ignore,
+				search_index=search_index,
+				feeds=feeds,
+				assets=assets,
+				minify=args.minify,
+			)
+	except BuildError as e:
+		print(f"Error: {e}")
+		return 1
+	finally:
+		if profile is not None:
+			print(profile.summary(args.profile_top))
+			if args.trace:
+				profile.write_trace(args.trace)
+				print(f"Wrote trace to {args.trace}")
+		if inline_cache is not None:
+			print(inline_cache.summary())
+		if tree_cache is not None:
+			print(tree_cache.stats.summary())
+			tree_cache.prune()
+		if pipeline is not None and pipeline.pages:
+			print(pipeline.summary())
 
 	print("Page generation complete!")
+	if args.precompress:
+		precompress(dir_path_public, manifest_path, args.compress_workers, args.compress_level, args.ignore)
+
+	if args.watch:
+		start_server(dir_path_public, args.port)
+		print(f"Serving {dir_path_public} on http://localhost:{args.port}, watching for changes...")
+		try:
+			watch(
+				[dir_path_content, dir_path_static, template_path],
+				lambda changed: rebuild(args, changed),
+				ignore=args.ignore,
+			)
+		except KeyboardInterrupt:
+			pass
+
+
+def rebuild(args, changed):
+	def under(dir_path):
+		prefix = os.path.normpath(dir_path) + os.sep
+		return any(path.startswith(prefix) for path in changed)
+
+	if under(dir_path_static):
+		sync_files(dir_path_static, dir_path_public, manifest_path, args.hash_static, args.link_mode, args.ignore)
+	assets = make_assets(args)
+	if (
+		under(dir_path_content)
+		or os.path.normpath(template_path) in changed
+		or (assets is not None and under(dir_path_static))
+	):
+		tree_cache = make_tree_cache(args, assets) if args.tree_cache else None
+		generate_pages_incremental(
+			dir_path_content,
+			template_path,
+			dir_path_public,
+			manifest_path,
+			args.workers,
+			changed,
+			tree_cache=tree_cache,
+			dir_path_static=dir_path_static,
+			explain=args.explain,
+			ignore=args.ignore,
+			search_index=make_search_index(args),
+			feeds=make_feeds(args),
+			assets=assets,
+			minify=args.minify,
+		)
+		if tree_cache is not None:
+			tree_cache.prune()
+	if args.precompress:
+		precompress(dir_path_public, manifest_path, args.compress_workers, args.compress_level, args.ignore)
 
 if __name__ == "__main__":
-	main()
\ No newline at end of file
+	sys.exit(main())
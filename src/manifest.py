@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+
+# Bump whenever a change to the generator can alter the HTML it writes, so
+# that incremental builds regenerate every page produced by an older version.
+GENERATOR_VERSION = "1"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def new_manifest():
+    return {
+        "generator": GENERATOR_VERSION,
+        "pages": {},
+        "assets": {},
+        "graph": {},
+        "outputs": {},
+        "fingerprints": {},
+        "compressed": {},
+    }
+
+
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return new_manifest()
+    with open(manifest_path, "r") as f:
+        try:
+            manifest = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Warning: ignoring unreadable manifest {manifest_path}")
+            return new_manifest()
+    if manifest.get("generator") != GENERATOR_VERSION:
+        return new_manifest()
+    for section, value in new_manifest().items():
+        manifest.setdefault(section, value)
+    return manifest
+
+
+def save_manifest(manifest_path, manifest):
+    dir_path = os.path.dirname(manifest_path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def page_entry(source_hash, template_hash, dest_path, assets_hash=None):
+    entry = {
+        "source_hash": source_hash,
+        "template_hash": template_hash,
+        "generator": GENERATOR_VERSION,
+        "dest_path": str(dest_path),
+    }
+    if assets_hash is not None:
+        entry["assets_hash"] = assets_hash
+    return entry
+
+
+def remove_output(dest_path, dest_dir_path):
+    print(f" * removing {dest_path}")
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    root = os.path.abspath(dest_dir_path)
+    dir_path = os.path.dirname(os.path.abspath(dest_path))
+    while dir_path != root and dir_path.startswith(root) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
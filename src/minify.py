@@ -0,0 +1,243 @@
+import io
+import re
+from itertools import islice
+
+# HTML's own whitespace characters; a no-break space is content.
+whitespace = " \t\n\r\f"
+
+# Whitespace next to these tags never renders, so it is dropped; between
+# any other tags and text a run of whitespace is collapsed to one space.
+block_tags = frozenset(
+    (
+        "address article aside blockquote body br dd details div dl dt fieldset figcaption figure footer form "
+        "h1 h2 h3 h4 h5 h6 head header hr html li link main meta nav ol p pre section summary table tbody td "
+        "tfoot th thead title tr ul"
+    ).split()
+)
+
+# Elements whose content is passed through untouched.
+preserved_tags = ("pre", "code", "textarea", "script", "style")
+
+# Rendered chunks are small (a tag, a run of text), so they are joined into
+# buffers of about this many characters before being minified.
+buffer_size = io.DEFAULT_BUFFER_SIZE
+
+tag_pattern = re.compile(r"""<(?:!--.*?--|[^"'>]*(?:(?:"[^"]*"|'[^']*')[^"'>]*)*)>""", re.DOTALL)
+tag_name_pattern = re.compile(r"<(/?)([a-zA-Z][^\s/>]*)")
+tag_starts = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ/!?")
+preserved_pattern = re.compile(r"<(" + "|".join(preserved_tags) + r")\b", re.IGNORECASE)
+closing_ends = frozenset(whitespace + ">")
+# Longest text a closing tag can start in before being recognised.
+closing_length = max(len(tag) for tag in preserved_tags) + 3
+# Whitespace that may change: runs of it, and newlines and tabs. A piece of
+# text containing none of run_starts has nothing to change.
+run_starts = ("\n", "  ", "\t", "\r", "\f")
+run_pattern = re.compile(f"[{whitespace}](?:(?<=[\t\n\r\f])[{whitespace}]*|[{whitespace}]+)")
+# The same plus single spaces next to a plain block tag. Looking behind
+# every space makes this several times slower to scan than run_pattern, so
+# it is kept for small documents such as the page template.
+space_pattern = re.compile(
+    f"[{whitespace}](?:[{whitespace}]+|(?<=[\t\n\r\f])"
+    f"|(?<=> )(?:{'|'.join(f'(?<=<{tag}> )|(?<=</{tag}> )' for tag in sorted(block_tags))})"
+    f"|(?=</?(?:{'|'.join(sorted(block_tags))})[{whitespace}/>]|<!))"
+    # Whitespace carried over to the start of a piece, which is decided by
+    # how the previous piece ended.
+    f"|\\A[{whitespace}]",
+    re.IGNORECASE,
+)
+
+
+class HTMLMinifier:
+    """Collapse insignificant whitespace in a stream of HTML text.
+
+    Text is fed in pieces and minified as it arrives; only a tag cut in two
+    by a piece boundary, trailing whitespace (which may turn out to be next
+    to a block tag) or the possible start of a preserved element's closing
+    tag is carried over to the next piece. Tags and the content of <pre>,
+    <code>, <textarea>, <script> and <style> are passed through as is.
+
+    Runs of whitespace are collapsed, or dropped next to a block tag; with
+    spaces, so are single spaces next to a block tag.
+    """
+
+    def __init__(self, spaces=False):
+        self.site_pattern = space_pattern if spaces else run_pattern
+        self.carry = ""
+        # Name of the preserved element being passed through.
+        self.preserving = None
+        # Whether the text minified so far ends with a block tag (or is empty).
+        self.after_block = True
+
+    def feed(self, text):
+        return self._minify(self.carry + text, final=False)
+
+    def close(self):
+        """Return the rest of the minified text once the stream has ended."""
+        return self._minify(self.carry, final=True)
+
+    def _minify(self, text, final):
+        self.carry = ""
+        out = []
+        position = 0
+        lowered = text.lower()
+        if self.preserving is not None:
+            closing = find_closing(lowered, self.preserving, 0, len(text))
+            if closing == -1:
+                return self._preserve(text, 0, final, out)
+            out.append(text[:closing])
+            position = closing
+            self.preserving = None
+            self.after_block = False
+
+        end = len(text)
+        if not final:
+            lt = text.rfind("<", position)
+            if lt != -1 and tag_pattern.match(text, lt) is None:
+                end = lt
+        while end > position and text[end - 1] in whitespace:
+            end -= 1
+
+        # From an element left open at the end on, everything is preserved.
+        opened = self._unclosed(text, lowered, position, end)
+        self._collapse(text, lowered, position, end if opened is None else opened.start(), out)
+        if opened is not None:
+            tag = tag_pattern.match(text, opened.start())
+            out.append(tag.group())
+            self.preserving = opened.group(1).lower()
+            return self._preserve(text, tag.end(), final, out)
+
+        if end > position:
+            self.after_block = text[end - 1] == ">" and self._ends_block(text, end)
+        if not final:
+            self.carry = text[end:]
+        return "".join(out)
+
+    def _preserve(self, text, position, final, out):
+        # Pass preserved content through, holding back what could be the
+        # start of its closing tag.
+        keep = len(text) if final else max(position, len(text) - closing_length)
+        out.append(text[position:keep])
+        self.carry = text[keep:]
+        self.after_block = False
+        return "".join(out)
+
+    def _unclosed(self, text, lowered, start, end):
+        # The first preserved element whose closing tag is not in
+        # text[start:end], if any.
+        unclosed = None
+        for name in preserved_tags:
+            index = lowered.rfind("<" + name, start, end)
+            if index == -1 or (unclosed is not None and index > unclosed.start()):
+                continue
+            opened = preserved_pattern.match(text, index)
+            tag = tag_pattern.match(text, index)
+            if opened is None or tag is None or tag.end() > end or tag.group().endswith("/>"):
+                continue
+            if find_closing(lowered, name, tag.end(), end) == -1:
+                unclosed = opened
+        return unclosed
+
+    def _collapse(self, text, lowered, start, end, out):
+        if self.site_pattern is run_pattern and not any(text.find(c, start, end) != -1 for c in run_starts):
+            out.append(text[start:end])
+            return
+        position = start
+        scan = start
+        while True:
+            match = self.site_pattern.search(text, scan, end)
+            if match is None:
+                break
+            site_start, site_end = match.span()
+            scan = self._preserved_end(text, lowered, start, site_start, end)
+            if scan is not None:
+                continue
+            scan = site_end
+            replacement = self._replace(text, site_start, site_end)
+            if replacement != match.group():
+                out.append(text[position:site_start])
+                out.append(replacement)
+                position = site_end
+        out.append(text[position:end])
+
+    def _preserved_end(self, text, lowered, start, index, end):
+        # Where the preserved element around text[index] closes, if it is
+        # inside one.
+        for name in preserved_tags:
+            opened = lowered.rfind("<" + name, start, index)
+            if opened == -1 or preserved_pattern.match(text, opened) is None:
+                continue
+            tag = tag_pattern.match(text, opened)
+            if tag is None or tag.end() > index or tag.group().endswith("/>"):
+                continue
+            closing = find_closing(lowered, name, tag.end(), end)
+            if closing == -1 or closing > index:
+                return end if closing == -1 else closing
+        return None
+
+    def _replace(self, text, start, end):
+        lt = text.rfind("<", 0, start)
+        tag = None
+        if lt != -1 and text[lt + 1 : lt + 2] in tag_starts:
+            tag = tag_pattern.match(text, lt)
+            if tag is not None and tag.end() > start:
+                # Inside a tag, such as between attributes.
+                return text[start:end]
+        if start == 0:
+            before = self.after_block
+        else:
+            before = tag is not None and tag.end() == start and is_block(text, lt)
+        if end == len(text):
+            after = True
+        else:
+            after = text[end] == "<" and text[end + 1 : end + 2] in tag_starts and is_block(text, end)
+        return "" if before or after else " "
+
+    def _ends_block(self, text, end):
+        lt = text.rfind("<", 0, end)
+        if lt == -1:
+            return False
+        tag = tag_pattern.match(text, lt)
+        return tag is not None and tag.end() == end and is_block(text, lt)
+
+
+def find_closing(lowered, name, start, end):
+    """Index of the first closing tag of element name in the lowercased
+    text lowered[start:end], or -1."""
+    closing = "</" + name
+    index = lowered.find(closing, start, end)
+    while index != -1 and lowered[index + len(closing) : index + len(closing) + 1] not in closing_ends:
+        index = lowered.find(closing, index + 1, end)
+    return index
+
+
+def is_block(html, position=0):
+    """Whether the tag at position in html is one whitespace next to is
+    insignificant: a block tag, a comment, a doctype or an instruction."""
+    match = tag_name_pattern.match(html, position)
+    return match is None or match.group(2).lower() in block_tags
+
+
+def minify_chunks(chunks, spaces=False):
+    """Minify an iterable of HTML chunks, yielding minified text in pieces of
+    about buffer_size characters."""
+    minifier = HTMLMinifier(spaces)
+    chunks = iter(chunks)
+    # Chunks are taken a batch at a time, the batch size following the
+    # chunk sizes seen so that joined pieces stay near buffer_size.
+    batch = 64
+    while True:
+        taken = list(islice(chunks, batch))
+        if not taken:
+            break
+        piece = "".join(taken)
+        batch = max(1, min(batch * buffer_size // max(len(piece), 1), 4096))
+        minified = minifier.feed(piece)
+        if minified:
+            yield minified
+    minified = minifier.close()
+    if minified:
+        yield minified
+
+
+def minify_html(html, spaces=True):
+    return "".join(minify_chunks([html], spaces))
@@ -0,0 +1,73 @@
+import hashlib
+import io
+import os
+
+
+class HashingFile(io.RawIOBase):
+    """Binary file wrapper that hashes everything written through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.digest.update(data)
+        return self.f.write(data)
+
+
+def write_output(dest_path, write, known_hash=None):
+    """Write an output file atomically, leaving it untouched when unchanged.
+
+    write(fp) is called with a text file object backed by a temporary file
+    next to dest_path. When the content hash equals known_hash (the hash
+    recorded for dest_path by the previous build) and dest_path still
+    exists, the temporary file is discarded so the existing file keeps its
+    mtime; otherwise it is renamed over dest_path, so readers never see a
+    truncated page. Returns the content hash and whether the file was
+    written.
+    """
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            hashing = HashingFile(f)
+            with io.TextIOWrapper(io.BufferedWriter(hashing)) as fp:
+                write(fp)
+        output_hash = hashing.digest.hexdigest()
+        if output_hash == known_hash and os.path.exists(dest_path):
+            os.remove(tmp_path)
+            return output_hash, False
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_hash, True
+
+
+class OutputLog:
+    """Output hashes carried between builds, plus write/skip counts for the
+    current one."""
+
+    def __init__(self, hashes=None):
+        self.hashes = dict(hashes) if hashes is not None else {}
+        self.written = 0
+        self.skipped = 0
+
+    def add(self, dest_path, output_hash, written):
+        self.hashes[str(dest_path)] = output_hash
+        if written:
+            self.written += 1
+        else:
+            self.skipped += 1
+
+    def remove(self, dest_path):
+        self.hashes.pop(str(dest_path), None)
+
+    def summary(self):
+        return f"Outputs: {self.written} written, {self.skipped} skipped as identical"
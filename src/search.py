@@ -0,0 +1,271 @@
+import hashlib
+import itertools
+import json
+import operator
+import os
+import re
+
+from output import write_output
+
+# Tags as written by the generator and templates. A bare "<" in page text
+# (which is not escaped) is left alone.
+tag_pattern = re.compile(r"<[A-Za-z/!][^<>]*>")
+term_pattern = re.compile(r"\w{2,40}")
+trailing_word_pattern = re.compile(r"\w+$")
+
+
+class TermCollector:
+    """Counts the terms in a stream of HTML chunks as it passes through.
+
+    Tags are stripped chunk by chunk; a tag or word cut off at the end of a
+    chunk is carried over to the next one, so chunks of any size (such as blocks
+    read back from the tree cache) give the same terms.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.carry = ""
+
+    def tee(self, chunks):
+        for chunk in chunks:
+            self.add(chunk)
+            yield chunk
+        self.add("", final=True)
+
+    def add(self, chunk, final=False):
+        text = self.carry + chunk
+        self.carry = ""
+        if not final:
+            start = text.rfind("<")
+            if start != -1 and text.find(">", start) == -1:
+                text, self.carry = text[:start], text[start:]
+            else:
+                word = trailing_word_pattern.search(text)
+                if word is not None:
+                    text, self.carry = text[: word.start()], text[word.start() :]
+        counts = self.counts
+        for term in term_pattern.findall(tag_pattern.sub(" ", text).casefold()):
+            counts[term] = counts.get(term, 0) + 1
+
+
+class SearchIndex:
+    """Per-page term lists kept between builds, inverted into prefix shards.
+
+    The store at store_path holds every indexed page's URL, title, term
+    counts (packed into one string, see pack_terms) and a stable document
+    id, so a build only re-indexes the pages it regenerates. write() emits search/docs.json ({id: [url, title]})
+    under dest_dir_path and one shard per term prefix, named by the hex of
+    the prefix's UTF-8 bytes. A client looks up a query term by loading only
+    the shard for its first prefix_length characters.
+
+    A shard maps each term to its postings as one flat list of doc id gaps
+    and counts, [id, count, gap, count, ...], ids ascending. Only the shards
+    holding a term of a page whose terms changed are rebuilt, by patching
+    the previous shard file; the stored term lists are only re-inverted for
+    shards that are missing, or were modified since they were written.
+    """
+
+    def __init__(self, store_path, dest_dir_path, prefix_length=2):
+        self.store_path = store_path
+        self.dir_path = os.path.join(dest_dir_path, "search")
+        self.dest_dir_path = dest_dir_path
+        self.prefix_length = prefix_length
+        self.store = {"next_id": 0, "pages": {}, "files": {}}
+        if os.path.exists(store_path):
+            with open(store_path, "r") as f:
+                try:
+                    self.store = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Warning: ignoring unreadable search index {store_path}")
+        # Documents whose terms changed this build, and their old and new
+        # terms.
+        self.changed = set()
+        self.dirty = set()
+        self.docs_changed = False
+        self.indexed = 0
+        self.written = 0
+        self.skipped = 0
+
+    def add(self, from_path, dest_path, title, counts):
+        url = page_url(dest_path, self.dest_dir_path)
+        pages = self.store["pages"]
+        terms = pack_terms(counts)
+        old = pages.get(from_path)
+        if old is not None:
+            doc_id = old["id"]
+            if old["url"] != url or old["title"] != title:
+                self.docs_changed = True
+            if old["terms"] != terms:
+                self.mark(doc_id, unpack_terms(old["terms"]))
+                self.mark(doc_id, counts)
+        else:
+            doc_id = self.store["next_id"]
+            self.store["next_id"] += 1
+            self.docs_changed = True
+            self.mark(doc_id, counts)
+        pages[from_path] = {"id": doc_id, "url": url, "title": title, "terms": terms}
+        self.indexed += 1
+
+    def retain(self, from_paths):
+        keep = set(from_paths)
+        pages = self.store["pages"]
+        for from_path in [p for p in pages if p not in keep]:
+            page = pages.pop(from_path)
+            self.mark(page["id"], unpack_terms(page["terms"]))
+            self.docs_changed = True
+
+    def mark(self, doc_id, terms):
+        self.changed.add(doc_id)
+        self.dirty.update(terms)
+
+    def write(self):
+        old_files = self.store["files"]
+        files = {}
+        dirty_terms = {}
+        for term in self.dirty:
+            dirty_terms.setdefault(term[: self.prefix_length], []).append(term)
+        shards = {}
+        rebuild = set()
+        for prefix in dirty_terms:
+            shard = self.read_shard(shard_name(prefix) + ".json")
+            if shard is None:
+                rebuild.add(prefix)
+            else:
+                shards[prefix] = shard
+        for filename in old_files:
+            prefix = prefix_from_name(filename)
+            if prefix is None or prefix in dirty_terms:
+                continue
+            if os.path.exists(os.path.join(self.dir_path, filename)):
+                files[filename] = old_files[filename]
+            else:
+                rebuild.add(prefix)
+
+        # Rebuilt shards are inverted from every page's terms; patched shards
+        # only need the changed pages' postings for their dirty terms.
+        added = {}
+        for page in self.store["pages"].values():
+            doc_id = page["id"]
+            changed = doc_id in self.changed
+            if not changed and not rebuild:
+                continue
+            for term, count in unpack_terms(page["terms"]).items():
+                if term[: self.prefix_length] in rebuild or (changed and term in self.dirty):
+                    added.setdefault(term, []).append((doc_id, count))
+        for prefix, shard in shards.items():
+            for term in dirty_terms[prefix]:
+                entries = [entry for entry in decode_postings(shard.get(term, ())) if entry[0] not in self.changed]
+                entries.extend(added.get(term, ()))
+                if entries:
+                    shard[term] = encode_postings(entries)
+                else:
+                    shard.pop(term, None)
+        for prefix in rebuild:
+            shards[prefix] = {}
+        for term, entries in added.items():
+            prefix = term[: self.prefix_length]
+            if prefix in rebuild:
+                shards[prefix][term] = encode_postings(entries)
+
+        outputs = {}
+        for prefix, shard in shards.items():
+            if shard:
+                outputs[shard_name(prefix) + ".json"] = shard
+        if self.docs_changed or not os.path.exists(os.path.join(self.dir_path, "docs.json")):
+            outputs["docs.json"] = {page["id"]: [page["url"], page["title"]] for page in self.store["pages"].values()}
+        elif "docs.json" in old_files:
+            files["docs.json"] = old_files["docs.json"]
+
+        for filename, data in sorted(outputs.items()):
+            text = json.dumps(data, separators=(",", ":"), sort_keys=True)
+            output_hash, written = write_output(
+                os.path.join(self.dir_path, filename), lambda fp: fp.write(text), old_files.get(filename)
+            )
+            files[filename] = output_hash
+            if written:
+                self.written += 1
+            else:
+                self.skipped += 1
+        self.skipped += len(files) - len(outputs)
+        for filename in old_files:
+            if filename not in files:
+                path = os.path.join(self.dir_path, filename)
+                if os.path.exists(path):
+                    os.remove(path)
+        self.store["files"] = files
+        self.changed = set()
+        self.dirty = set()
+        self.docs_changed = False
+
+    def read_shard(self, filename):
+        """Return a shard as written ({term: flat postings}), or None when the
+        file is missing or no longer matches its recorded hash."""
+        expected = self.store["files"].get(filename)
+        path = os.path.join(self.dir_path, filename)
+        if expected is None or not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != expected:
+            return None
+        return json.loads(data)
+
+    def save(self):
+        dir_path = os.path.dirname(self.store_path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        tmp_path = self.store_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(self.store, separators=(",", ":")))
+        os.replace(tmp_path, self.store_path)
+
+    def summary(self):
+        return (
+            f"Search index: {len(self.store['pages'])} page(s), {self.indexed} re-indexed; "
+            f"{self.written} file(s) written, {self.skipped} unchanged"
+        )
+
+
+def pack_terms(counts):
+    """Pack term counts into "term count term count ...". Loading the store
+    then only parses one string per page; the counts are unpacked for the
+    pages a build actually needs."""
+    return " ".join(f"{term} {count}" for term, count in sorted(counts.items()))
+
+
+def unpack_terms(packed):
+    parts = packed.split()
+    return dict(zip(parts[0::2], map(int, parts[1::2])))
+
+
+def encode_postings(entries):
+    entries.sort()
+    ids = [doc_id for doc_id, _ in entries]
+    flat = [0] * (2 * len(entries))
+    flat[0::2] = map(operator.sub, ids, [0] + ids[:-1])
+    flat[1::2] = [count for _, count in entries]
+    return flat
+
+
+def decode_postings(flat):
+    return list(zip(itertools.accumulate(flat[0::2]), flat[1::2]))
+
+
+def prefix_from_name(filename):
+    name, ext = os.path.splitext(filename)
+    if ext != ".json" or name == "docs":
+        return None
+    return bytes.fromhex(name).decode()
+
+
+def shard_name(prefix):
+    return prefix.encode().hex()
+
+
+def page_url(dest_path, dest_dir_path):
+    rel_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[: -len("index.html")]
+    return "/" + rel_path
@@ -0,0 +1,71 @@
+import re
+
+from minify import minify_chunks, minify_html
+
+slot_pattern = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class Template:
+    """A page template pre-split into literal segments and named slots.
+
+    `{{ Name }}` placeholders become slots. Rendering never copies the whole
+    document more than once: `render` joins the segments in a single pass and
+    `write` sends them straight to a file object. A slot value is either a
+    string or an iterable of string chunks (such as `HTMLNode.iter_html()`),
+    which is streamed through as-is (an iterator is consumed by the first slot
+    that uses it). Slots without a value keep their
+    placeholder text, as the old `str.replace` templating did.
+
+    With minify, the template's own whitespace is minified once up front
+    and `render` and `write` pass the segments through the HTML minifier as
+    they stream (see minify.HTMLMinifier).
+    """
+
+    def __init__(self, text, minify=False):
+        self.minify = minify
+        if minify:
+            text = minify_html(text)
+        self.literals = []
+        self.slots = []
+        self.placeholders = []
+        position = 0
+        for match in slot_pattern.finditer(text):
+            self.literals.append(text[position : match.start()])
+            self.slots.append(match.group(1))
+            self.placeholders.append(match.group(0))
+            position = match.end()
+        self.literals.append(text[position:])
+
+    def iter_segments(self, values):
+        for i, slot in enumerate(self.slots):
+            yield self.literals[i]
+            value = values.get(slot, self.placeholders[i])
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+        yield self.literals[-1]
+
+    def iter_output(self, values):
+        segments = self.iter_segments(values)
+        return minify_chunks(segments) if self.minify else segments
+
+    def render(self, values):
+        return "".join(self.iter_output(values))
+
+    def write(self, fp, values):
+        fp.writelines(self.iter_output(values))
+
+    def __repr__(self):
+        return f"Template(slots={self.slots}, minify={self.minify})"
+
+
+def load_template(template_path, assets=None, minify=False):
+    """Compile the template at template_path. With an AssetMap, its
+    references to static files are first rewritten to fingerprinted URLs.
+    With minify, pages rendered through it have their whitespace collapsed."""
+    with open(template_path, "r") as f:
+        text = f.read()
+    if assets is not None:
+        text = assets.rewrite_references(text)
+    return Template(text, minify)
@@ -0,0 +1,182 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import textnode
+from assets import AssetMap, fingerprint_files, fingerprint_path
+from gencontent import generate_pages_incremental
+from manifest import hash_file
+from treecache import TreeCache
+from textnode import TextNode, text_node_to_html_node, text_type_image, text_type_link
+
+
+class TestAssetMap(unittest.TestCase):
+    def setUp(self):
+        self.assets = AssetMap({"/index.css": "/index.12345678.css", "/images/a.png": "/images/a.87654321.png"}, {})
+
+    def test_rewrite(self):
+        self.assertEqual(self.assets.rewrite("/index.css"), "/index.12345678.css")
+        self.assertEqual(self.assets.rewrite("/index.css?v=1#top"), "/index.12345678.css?v=1#top")
+        self.assertEqual(self.assets.rewrite("/missing.css"), "/missing.css")
+        self.assertEqual(self.assets.rewrite("//cdn.example.com/index.css"), "//cdn.example.com/index.css")
+        self.assertEqual(self.assets.rewrite("index.css"), "index.css")
+
+    def test_rewrite_references(self):
+        html = '<link href="/index.css" rel="stylesheet"><img src=\'/images/a.png\'><a href="/about">x</a>'
+        self.assertEqual(
+            self.assets.rewrite_references(html),
+            '<link href="/index.12345678.css" rel="stylesheet"><img src=\'/images/a.87654321.png\'>'
+            '<a href="/about">x</a>',
+        )
+
+    def test_text_nodes_rewritten(self):
+        textnode.asset_map = self.assets
+        try:
+            image = text_node_to_html_node(TextNode("alt", text_type_image, "/images/a.png"))
+            link = text_node_to_html_node(TextNode("css", text_type_link, "/index.css"))
+        finally:
+            textnode.asset_map = None
+        self.assertEqual(image.props["src"], "/images/a.87654321.png")
+        self.assertEqual(link.props["href"], "/index.12345678.css")
+        plain = text_node_to_html_node(TextNode("alt", text_type_image, "/images/a.png"))
+        self.assertEqual(plain.props["src"], "/images/a.png")
+
+    def test_fingerprint_path(self):
+        png = fingerprint_path(os.path.join("images", "a.png"), "3f9a1c2b77")
+        self.assertEqual(png, os.path.join("images", "a.3f9a1c2b.png"))
+        self.assertEqual(fingerprint_path("LICENSE", "3f9a1c2b77"), "LICENSE.3f9a1c2b")
+
+
+class TestFingerprintFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, "static")
+        self.dest = os.path.join(root, "public")
+        self.manifest = os.path.join(root, "manifest.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write("index.css", "body {}")
+        self.write(os.path.join("images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.static, rel_path), "w") as f:
+            f.write(text)
+
+    def fingerprint(self):
+        with redirect_stdout(io.StringIO()):
+            return fingerprint_files(self.static, self.dest, self.manifest)
+
+    def test_copies_and_asset_manifest(self):
+        assets = self.fingerprint()
+        css_hash = hash_file(os.path.join(self.static, "index.css"))
+        css_url = f"/index.{css_hash[:8]}.css"
+        self.assertEqual(assets.rewrite("/index.css"), css_url)
+        with open(os.path.join(self.dest, css_url[1:])) as f:
+            self.assertEqual(f.read(), "body {}")
+        with open(os.path.join(self.dest, "asset-manifest.json")) as f:
+            self.assertEqual(json.load(f), assets.urls)
+        self.assertEqual(assets.hashes[os.path.normpath(os.path.join(self.static, "index.css"))], css_hash)
+
+    def test_changed_asset_replaces_copy(self):
+        old_url = self.fingerprint().rewrite("/index.css")
+        self.write("index.css", "body { color: red }")
+        new_url = self.fingerprint().rewrite("/index.css")
+        self.assertNotEqual(old_url, new_url)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, old_url[1:])))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, new_url[1:])))
+
+    def test_unchanged_stat_not_rehashed(self):
+        path = os.path.join(self.static, "index.css")
+        url = self.fingerprint().rewrite("/index.css")
+        stat = os.stat(path)
+        # Same size and mtime: the recorded hash is trusted without reading.
+        self.write("index.css", "bodx {}")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.fingerprint().rewrite("/index.css"), url)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertNotEqual(self.fingerprint().rewrite("/index.css"), url)
+
+
+class TestFingerprintedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, "static")
+        self.content = os.path.join(root, "content")
+        self.dest = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, "manifest.json")
+        os.makedirs(self.static)
+        os.makedirs(os.path.join(self.content, "gallery"))
+        with open(self.template, "w") as f:
+            f.write('<link href="/index.css"><title>{{ Title }}</title>{{ Content }}')
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "a.png"), "png")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[Gallery](/gallery)\n")
+        self.write(os.path.join(self.content, "gallery", "index.md"), "# Gallery\n\n![A](/a.png)\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, rel_path):
+        with open(os.path.join(self.dest, rel_path)) as f:
+            return f.read()
+
+    def build(self, tree_cache=None):
+        with redirect_stdout(io.StringIO()):
+            assets = fingerprint_files(self.static, self.dest, self.manifest)
+            if tree_cache is not None:
+                tree_cache.assets = assets
+            return generate_pages_incremental(
+                self.content,
+                self.template,
+                self.dest,
+                self.manifest,
+                dir_path_static=self.static,
+                tree_cache=tree_cache,
+                assets=assets,
+            ), assets
+
+    def test_references_rewritten(self):
+        _, assets = self.build()
+        self.assertIn(f'<link href="{assets.rewrite("/index.css")}">', self.read("index.html"))
+        image = f'<img src="{assets.rewrite("/a.png")}" alt="A">'
+        self.assertIn(image, self.read(os.path.join("gallery", "index.html")))
+        self.assertIsNone(textnode.asset_map)
+
+    def test_asset_change_rebuilds_referrers_only(self):
+        self.build()
+        self.assertEqual(self.build()[0], 0)
+        self.write(os.path.join(self.static, "a.png"), "new png")
+        generated, assets = self.build()
+        self.assertEqual(generated, 1)
+        self.assertIn(assets.rewrite("/a.png"), self.read(os.path.join("gallery", "index.html")))
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(self.build()[0], 2)
+
+    def test_tree_cache_keyed_by_referenced_assets(self):
+        def build():
+            tree_cache = TreeCache(os.path.join(self.tmp.name, "trees"), 1 << 20)
+            self.build(tree_cache)
+            return tree_cache.stats.hits, tree_cache.stats.misses
+
+        self.assertEqual(build(), (0, 2))
+        # Only the template references index.css, so both bodies are reused.
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(build(), (2, 0))
+        self.write(os.path.join(self.static, "a.png"), "new png")
+        self.assertEqual(build(), (0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,19 @@
+import random
 import unittest
 from htmlnode import HTMLNode
 from block_markdown import (
     markdown_to_html_node,
     markdown_to_blocks,
+    find_title_bytes,
+    iter_blocks,
+    iter_blocks_bytes,
+    iter_blocks_html,
+    blocks_to_html_node,
     block_to_block_type,
-    extract_title,
+    classify_block,
+    disable_inline_cache,
+    enable_inline_cache,
+    inline_cache_counts,
     block_type_paragraph,
     block_type_heading,
     block_type_code,
@@ -12,6 +21,7 @@ from block_markdown import (
     block_type_ulist,
     block_type_quote,
 )
+from gencontent import extract_title
 
 
 class TestBlockMarkdown(unittest.TestCase):
@@ -58,6 +68,63 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        md = """
+This is **bolded** paragraph
+
+
+
+
+This is another paragraph with *italic* text and `code` here
+This is the same paragraph on a new line
+
+* This is a list
+* with items
+"""
+        self.assertEqual(list(iter_blocks(md.splitlines(keepends=True))), markdown_to_blocks(md))
+
+    def test_iter_blocks_keeps_fenced_code_whole(self):
+        lines = ["# title\n", "\n", "```\n", "line one\n", "\n", "\n", "line two\n", "```\n", "\n", "after\n"]
+        self.assertEqual(
+            list(iter_blocks(lines)),
+            ["# title", "```\nline one\n\n\nline two\n```", "after"],
+        )
+
+    def test_iter_blocks_is_lazy(self):
+        def lines():
+            yield "first\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(iter_blocks(lines())), "first")
+
+    def test_iter_blocks_bytes_keeps_fenced_code_whole(self):
+        md = "# title\n\n```\nline one\n\n\nline two\n```\n\nafter\n"
+        self.assertEqual(
+            list(iter_blocks_bytes(md.encode())),
+            ["# title", "```\nline one\n\n\nline two\n```", "after"],
+        )
+
+    def test_iter_blocks_bytes_matches_iter_blocks(self):
+        pieces = [
+            "", "", "  ", "# Title", "text", "```", "```py", "```x```", "* item", "> quote", "caf\u00e9 \u2713", "x ```"
+        ]
+        rng = random.Random(0)
+        for _ in range(500):
+            md = "\n".join(rng.choice(pieces) for _ in range(rng.randrange(12)))
+            expected = list(iter_blocks(md.splitlines(keepends=True)))
+            self.assertEqual(list(iter_blocks_bytes(md.encode())), expected, repr(md))
+
+    def test_find_title_bytes(self):
+        self.assertEqual(find_title_bytes(b"# Title\n\nbody"), "Title")
+        self.assertEqual(find_title_bytes(b"intro\n\n# Caf\xc3\xa9"), "Caf\u00e9")
+        self.assertEqual(find_title_bytes(b"## not a title\n#also not"), None)
+
+    def test_iter_blocks_html(self):
+        blocks = ["# heading", "some *text*"]
+        html_nodes = [blocks_to_html_node([block]).children[0] for block in blocks]
+        self.assertEqual("".join(iter_blocks_html(html_nodes)), blocks_to_html_node(blocks).to_html())
+
     def test_block_to_block_types(self):
         block = "# heading"
         self.assertEqual(block_to_block_type(block), block_type_heading)
@@ -72,6 +139,25 @@ This is the same paragraph on a new line
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), block_type_paragraph)
 
+    def test_classify_block_returns_lines(self):
+        self.assertEqual(classify_block("> a\n> b"), (block_type_quote, ["> a", "> b"]))
+        self.assertEqual(classify_block("- a\n- b"), (block_type_ulist, ["- a", "- b"]))
+        self.assertEqual(classify_block("1. a\n3. b"), (block_type_paragraph, ["1. a", "3. b"]))
+        self.assertEqual(classify_block("* a\nb"), (block_type_paragraph, ["* a", "b"]))
+        self.assertEqual(classify_block("> a\nb")[0], block_type_paragraph)
+        self.assertEqual(classify_block("## h")[0], block_type_heading)
+
+    def test_inline_cache(self):
+        md = "same *fragment*\n\nsame *fragment*\n\nother"
+        expected = markdown_to_html_node(md).to_html()
+        enable_inline_cache(16)
+        try:
+            self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+            self.assertEqual(inline_cache_counts(), (1, 2))
+        finally:
+            disable_inline_cache()
+        self.assertEqual(inline_cache_counts(), (0, 0))
+
     def test_paragraph(self):
         md = """
 This is **bolded** paragraph
@@ -196,7 +282,8 @@ this is paragraph text
     def test_extract_multi_titles(self):
         title = "# Hello\n\n## Hello x2\n\n### Hello x3\n\n#### Hello x4\n\n##### Hello x5\n\n###### Hello x6"
         extract = extract_title(title)
-        expected = "Hello\nHello x2\nHello x3\nHello x4\nHello x5\nHello x6"
+        # Only a level-one heading is a page title.
+        expected = "Hello"
         self.assertEqual(extract, expected)
 
 
@@ -0,0 +1,97 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from compress import compress_file, precompress
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, "manifest.json")
+        os.makedirs(os.path.join(self.dest, "blog"))
+        self.page = "<p>" + "The Lord of the Rings. " * 100 + "</p>"
+        self.write("index.html", self.page)
+        self.write(os.path.join("blog", "post.html"), self.page * 2)
+        self.write("index.css", "body { margin: 0 }\n" * 50)
+        self.write("tiny.js", "x()")
+        self.write(os.path.join("images", "a.png"), "p" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.dest, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def precompress(self, workers=1):
+        with redirect_stdout(io.StringIO()):
+            return precompress(self.dest, self.manifest, workers)
+
+    def gz(self, rel_path):
+        return os.path.join(self.dest, rel_path) + ".gz"
+
+    def test_siblings_written(self):
+        compressed, unchanged, skipped, size, gz_size = self.precompress()
+        self.assertEqual((compressed, unchanged, skipped), (4, 0, 1))
+        with gzip.open(self.gz("index.html"), "rt") as f:
+            self.assertEqual(f.read(), self.page)
+        self.assertTrue(os.path.exists(self.gz(os.path.join("blog", "post.html"))))
+        self.assertFalse(os.path.exists(self.gz("tiny.js")))
+        self.assertFalse(os.path.exists(self.gz(os.path.join("images", "a.png"))))
+        self.assertLess(gz_size, size / 5)
+
+    def test_unchanged_skipped(self):
+        self.precompress()
+        os.utime(self.gz("index.html"), (0, 0))
+        self.assertEqual(self.precompress()[:2], (0, 4))
+        # Rewritten with the same bytes: hashed, but not compressed again.
+        self.write("index.html", self.page)
+        self.assertEqual(self.precompress()[:2], (0, 4))
+        self.assertEqual(os.path.getmtime(self.gz("index.html")), 0)
+        self.write("index.html", self.page + "<p>More</p>")
+        self.assertEqual(self.precompress()[:2], (1, 3))
+        self.assertNotEqual(os.path.getmtime(self.gz("index.html")), 0)
+
+    def test_stale_siblings_removed(self):
+        self.precompress()
+        os.remove(os.path.join(self.dest, "blog", "post.html"))
+        self.write("index.css", "a{}")
+        self.precompress()
+        self.assertFalse(os.path.exists(self.gz(os.path.join("blog", "post.html"))))
+        self.assertFalse(os.path.exists(self.gz("index.css")))
+
+    def test_missing_sibling_restored(self):
+        self.precompress()
+        os.remove(self.gz("index.html"))
+        self.assertEqual(self.precompress()[:2], (1, 3))
+        self.assertTrue(os.path.exists(self.gz("index.html")))
+
+    def test_parallel_matches_serial(self):
+        self.precompress()
+        with open(self.gz("index.html"), "rb") as f:
+            serial = f.read()
+        os.remove(self.manifest)
+        self.assertEqual(self.precompress(workers=2)[0], 4)
+        with open(self.gz("index.html"), "rb") as f:
+            self.assertEqual(f.read(), serial)
+
+    def test_compress_file_deterministic(self):
+        path = os.path.join(self.dest, "index.html")
+        compress_file(path, 9)
+        with open(path + ".gz", "rb") as f:
+            first = f.read()
+        os.remove(path + ".gz")
+        compress_file(path, 9)
+        with open(path + ".gz", "rb") as f:
+            self.assertEqual(f.read(), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from copystatic import sync_files
+
+
+class TestSyncFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, "build", "manifest.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def sync(self, **kwargs):
+        return sync_files(self.static, self.public, self.manifest, **kwargs)
+
+    def test_initial_sync_copies_everything(self):
+        changed, removed = self.sync()
+        self.assertEqual(changed, [os.path.join("images", "a.png"), "index.css"])
+        self.assertEqual(removed, [])
+        self.assertEqual(self.read(os.path.join(self.public, "images", "a.png")), "png")
+
+    def test_unchanged_files_skipped(self):
+        self.sync()
+        changed, removed = self.sync()
+        self.assertEqual((changed, removed), ([], []))
+
+    def test_modified_file_copied(self):
+        self.sync()
+        css = os.path.join(self.static, "index.css")
+        self.write(css, "body { margin: 0 }")
+        changed, _ = self.sync()
+        self.assertEqual(changed, ["index.css"])
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "body { margin: 0 }")
+
+    def test_same_size_different_mtime(self):
+        self.sync()
+        css = os.path.join(self.static, "index.css")
+        os.utime(css, ns=(0, 0))
+        self.assertEqual(self.sync(use_hash=True)[0], [])
+        self.assertEqual(os.stat(os.path.join(self.public, "index.css")).st_mtime_ns, 0)
+        self.write(css, "body {x}")
+        os.utime(css, ns=(0, 0))
+        self.assertEqual(self.sync(use_hash=True)[0], ["index.css"])
+
+    def test_stale_files_removed_generated_kept(self):
+        self.sync()
+        self.write(os.path.join(self.public, "index.html"), "<html>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        changed, removed = self.sync()
+        self.assertEqual(removed, [os.path.join("images", "a.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_hardlink(self):
+        self.sync(link_mode="hardlink")
+        self.assertTrue(
+            os.path.samefile(os.path.join(self.static, "index.css"), os.path.join(self.public, "index.css"))
+        )
+        self.assertEqual(self.sync(link_mode="hardlink")[0], [])
+
+    def test_reflink(self):
+        self.sync(link_mode="reflink")
+        self.assertEqual(self.read(os.path.join(self.public, "index.css")), "body {}")
+        self.assertEqual(self.sync(link_mode="reflink")[0], [])
+
+    def test_invalid_link_mode(self):
+        with self.assertRaises(ValueError):
+            self.sync(link_mode="symlink")
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
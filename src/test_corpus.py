@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from block_markdown import markdown_to_html_node
+from corpus import shapes, write_corpus
+
+
+class TestCorpus(unittest.TestCase):
+    def read_tree(self, dir_path):
+        files = {}
+        for dir_name, _, filenames in os.walk(dir_path):
+            for filename in filenames:
+                path = os.path.join(dir_name, filename)
+                with open(path) as f:
+                    files[os.path.relpath(path, dir_path)] = f.read()
+        return files
+
+    def test_deterministic(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_corpus(os.path.join(tmp, "a"), "small", scale=0.005, seed=7)
+            write_corpus(os.path.join(tmp, "b"), "small", scale=0.005, seed=7)
+            self.assertEqual(self.read_tree(os.path.join(tmp, "a")), self.read_tree(os.path.join(tmp, "b")))
+
+    def test_every_shape_parses(self):
+        for shape in shapes:
+            with tempfile.TemporaryDirectory() as tmp:
+                pages = write_corpus(tmp, shape, scale=0.01)
+                files = self.read_tree(tmp)
+                self.assertEqual(len(files), pages)
+                for markdown in files.values():
+                    self.assertTrue(markdown.startswith("# Page "))
+                    markdown_to_html_node("\n\n".join(markdown.split("\n\n")[:200]))
+
+    def test_deep_nesting(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_corpus(tmp, "deep", scale=0.1)
+            depth = max(os.path.relpath(d, tmp).count(os.sep) for d, _, _ in os.walk(tmp))
+            self.assertEqual(depth, shapes["deep"]["depth"] - 2)
+
+    def test_invalid_shape(self):
+        with self.assertRaises(ValueError):
+            write_corpus("unused", "nope")
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
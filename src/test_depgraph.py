@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from depgraph import DependencyGraph, page_dependencies, resolve_reference, template_dependencies
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def graph(self):
+        graph = DependencyGraph()
+        graph.record("content/a.md", {"template": ["template.html"], "page": ["content/b.md"]})
+        graph.record("content/b.md", {"template": ["template.html"], "asset": ["static/x.png"]})
+        graph.record("content/c.md", {"template": ["other.html"]})
+        return graph
+
+    def test_source_change_only_invalidates_itself(self):
+        self.assertEqual(self.graph().invalidate(["content/b.md"]), {"content/b.md": "source changed"})
+
+    def test_template_change_invalidates_its_pages(self):
+        reasons = self.graph().invalidate(["./template.html"])
+        self.assertEqual(
+            reasons,
+            {
+                "template.html": "source changed",
+                "content/a.md": "template template.html changed",
+                "content/b.md": "template template.html changed",
+            },
+        )
+
+    def test_references_do_not_invalidate(self):
+        self.assertEqual(self.graph().invalidate(["static/x.png"]), {"static/x.png": "source changed"})
+
+    def test_referrers(self):
+        graph = self.graph()
+        self.assertEqual(graph.referrers("content/b.md"), [("content/a.md", "page")])
+        self.assertEqual(graph.referrers("template.html"), [("content/a.md", "template"), ("content/b.md", "template")])
+
+    def test_remove(self):
+        graph = self.graph()
+        graph.remove("./content/a.md")
+        self.assertEqual(graph.referrers("content/b.md"), [])
+
+
+class TestReferences(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        for path in ("content/index.md", "content/blog/index.md", "content/about.md", "static/images/a.png", "static/site.css"):
+            path = os.path.join(self.tmp.name, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("# Page")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def resolve(self, target):
+        return resolve_reference(target, self.content, self.static)
+
+    def test_resolve_reference(self):
+        self.assertEqual(self.resolve("/"), ("page", os.path.join(self.content, "index.md")))
+        self.assertEqual(self.resolve("/blog#top"), ("page", os.path.join(self.content, "blog", "index.md")))
+        self.assertEqual(self.resolve("/about"), ("page", os.path.join(self.content, "about.md")))
+        self.assertEqual(self.resolve("/images/a.png?v=1"), ("asset", os.path.join(self.static, "images", "a.png")))
+        self.assertIsNone(self.resolve("/missing"))
+        self.assertIsNone(self.resolve("https://example.com/about"))
+        self.assertIsNone(self.resolve("//example.com/about"))
+        self.assertIsNone(self.resolve("about"))
+
+    def test_page_dependencies(self):
+        page = os.path.join(self.content, "about.md")
+        with open(page, "w") as f:
+            f.write("# About\n\n[home](/) and ![pic](/images/a.png) and [out](https://example.com)\n\n")
+            f.write("[wrapped\nlink](/blog)")
+        dependencies = page_dependencies(page, "template.html", self.content, self.static)
+        self.assertEqual(
+            dependencies,
+            {
+                "page": [os.path.join(self.content, "index.md"), os.path.join(self.content, "blog", "index.md")],
+                "asset": [os.path.join(self.static, "images", "a.png")],
+                "template": ["template.html"],
+            },
+        )
+
+    def test_template_dependencies(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(template, "w") as f:
+            f.write('<link href="/site.css" rel="stylesheet"><a href="/">home</a>{{ Content }}')
+        dependencies = template_dependencies(template, self.content, self.static)
+        self.assertEqual(
+            dependencies,
+            {"page": [os.path.join(self.content, "index.md")], "asset": [os.path.join(self.static, "site.css")]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
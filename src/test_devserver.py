@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from devserver import diff_snapshots, snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "sub"))
+        for path in (self.template, os.path.join(self.content, "a.md"), os.path.join(self.content, "sub", "b.md")):
+            with open(path, "w") as f:
+                f.write("x")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_files_and_dirs(self):
+        files = snapshot([self.content, self.template])
+        self.assertEqual(
+            sorted(files),
+            sorted(
+                os.path.normpath(path)
+                for path in (self.template, os.path.join(self.content, "a.md"), os.path.join(self.content, "sub", "b.md"))
+            ),
+        )
+
+    def test_diff_detects_changes(self):
+        paths = [self.content, self.template]
+        before = snapshot(paths)
+        a = os.path.join(self.content, "a.md")
+        with open(a, "w") as f:
+            f.write("longer")
+        os.remove(os.path.join(self.content, "sub", "b.md"))
+        c = os.path.join(self.content, "c.md")
+        open(c, "w").close()
+        changed = diff_snapshots(before, snapshot(paths))
+        self.assertEqual(
+            changed,
+            {os.path.normpath(a), os.path.normpath(c), os.path.normpath(os.path.join(self.content, "sub", "b.md"))},
+        )
+
+    def test_diff_no_changes(self):
+        paths = [self.content]
+        self.assertEqual(diff_snapshots(snapshot(paths), snapshot(paths)), set())
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,189 @@
+import io
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+from contextlib import redirect_stdout
+
+import feeds
+from feeds import SiteFeeds, w3c_date
+from gencontent import generate_pages_incremental, generate_pages_recursive
+
+sitemap_ns = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+atom_ns = "{http://www.w3.org/2005/Atom}"
+
+
+class TestSiteFeeds(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.tmp.name, "build", "feeds.json")
+        self.dest = os.path.join(self.tmp.name, "public")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def feeds(self, feed_size=20):
+        return SiteFeeds(self.store_path, self.dest, "https://example.com/", feed_size)
+
+    def parse(self, filename):
+        return ElementTree.parse(os.path.join(self.dest, filename)).getroot()
+
+    def test_sitemap_and_feeds(self):
+        site = self.feeds(feed_size=2)
+        site.add("index.md", os.path.join(self.dest, "index.html"), "Home & Away", 100)
+        site.add("a b.md", os.path.join(self.dest, "a b.html"), "<Old>", 50)
+        site.add("blog/index.md", os.path.join(self.dest, "blog", "index.html"), "Blog", 200)
+        site.write()
+
+        urls = [
+            (url.find(f"{sitemap_ns}loc").text, url.find(f"{sitemap_ns}lastmod").text)
+            for url in self.parse("sitemap.xml")
+        ]
+        self.assertEqual(
+            urls,
+            [
+                ("https://example.com/", w3c_date(100)),
+                ("https://example.com/a%20b.html", w3c_date(50)),
+                ("https://example.com/blog/", w3c_date(200)),
+            ],
+        )
+        atom = self.parse("atom.xml")
+        self.assertEqual(atom.find(f"{atom_ns}title").text, "Home & Away")
+        self.assertEqual(atom.find(f"{atom_ns}updated").text, w3c_date(200))
+        self.assertEqual(atom.find(f"{atom_ns}author/{atom_ns}name").text, "Home & Away")
+        titles = [entry.find(f"{atom_ns}title").text for entry in atom.iter(f"{atom_ns}entry")]
+        self.assertEqual(titles, ["Blog", "Home & Away"])
+        links = [item.find("link").text for item in self.parse("rss.xml").iter("item")]
+        self.assertEqual(links, ["https://example.com/blog/", "https://example.com/"])
+
+    def test_unchanged_not_rewritten(self):
+        site = self.feeds()
+        site.add("index.md", os.path.join(self.dest, "index.html"), "Home", 100)
+        site.add("a.md", os.path.join(self.dest, "a.html"), "A", 50)
+        site.write()
+        site.save()
+        sitemap_path = os.path.join(self.dest, "sitemap.xml")
+        os.utime(sitemap_path, (0, 0))
+
+        site = self.feeds()
+        site.add("a.md", os.path.join(self.dest, "a.html"), "A", 50)
+        site.write()
+        self.assertEqual((site.written, site.skipped), (0, 3))
+        self.assertEqual(os.path.getmtime(sitemap_path), 0)
+
+        site = self.feeds()
+        site.add("a.md", os.path.join(self.dest, "a.html"), "A renamed", 50)
+        site.write()
+        self.assertEqual((site.written, site.skipped), (2, 1))
+        self.assertEqual(os.path.getmtime(sitemap_path), 0)
+
+    def test_author_change_rewrites_atom(self):
+        site = self.feeds()
+        site.add("index.md", os.path.join(self.dest, "index.html"), "Home", 100)
+        site.write()
+        site.save()
+
+        site = SiteFeeds(self.store_path, self.dest, "https://example.com/", author="Jo")
+        site.write()
+        site.save()
+        self.assertEqual((site.written, site.skipped), (1, 2))
+        self.assertEqual(self.parse("atom.xml").find(f"{atom_ns}author/{atom_ns}name").text, "Jo")
+
+        site = SiteFeeds(self.store_path, self.dest, "https://example.com/", author="Jo")
+        site.write()
+        self.assertEqual((site.written, site.skipped), (0, 3))
+
+    def test_settings_change_rewrites_files(self):
+        site = self.feeds()
+        site.add("index.md", os.path.join(self.dest, "index.html"), "Home", 100)
+        site.add("a.md", os.path.join(self.dest, "a.html"), "A", 50)
+        site.write()
+        site.save()
+
+        site = SiteFeeds(self.store_path, self.dest, "https://new.example.org", feed_size=1)
+        site.write()
+        site.save()
+        self.assertEqual((site.written, site.skipped), (3, 0))
+        locs = [url.find(f"{sitemap_ns}loc").text for url in self.parse("sitemap.xml")]
+        self.assertEqual(locs, ["https://new.example.org/", "https://new.example.org/a.html"])
+        self.assertEqual(len(list(self.parse("atom.xml").iter(f"{atom_ns}entry"))), 1)
+
+        site = SiteFeeds(self.store_path, self.dest, "https://new.example.org/", feed_size=1)
+        site.write()
+        self.assertEqual((site.written, site.skipped), (0, 3))
+
+    def test_sitemap_index_past_limit(self):
+        limit = feeds.sitemap_limit
+        feeds.sitemap_limit = 2
+        try:
+            site = self.feeds()
+            for i in range(5):
+                site.add(f"{i}.md", os.path.join(self.dest, f"{i}.html"), str(i), i)
+            site.write()
+            site.save()
+            locs = [loc.text for loc in self.parse("sitemap.xml").iter(f"{sitemap_ns}loc")]
+            self.assertEqual(locs, [f"https://example.com/sitemap-{i}.xml" for i in (1, 2, 3)])
+            self.assertEqual(len(self.parse("sitemap-3.xml")), 1)
+
+            site = self.feeds()
+            site.retain(["0.md", "1.md"])
+            site.write()
+            self.assertEqual(len(self.parse("sitemap.xml")), 2)
+            self.assertFalse(os.path.exists(os.path.join(self.dest, "sitemap-1.xml")))
+        finally:
+            feeds.sitemap_limit = limit
+
+
+class TestFeedsBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.dest = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, "manifest.json")
+        self.store_path = os.path.join(root, "feeds.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.write_page("index.md", "# Home\n\nWelcome.\n", 1000)
+        self.write_page("blog/post.md", "# First post\n\nHello.\n", 2000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, rel_path, markdown, mtime):
+        path = os.path.join(self.content, rel_path)
+        with open(path, "w") as f:
+            f.write(markdown)
+        os.utime(path, (mtime, mtime))
+
+    def titles(self):
+        atom = ElementTree.parse(os.path.join(self.dest, "atom.xml")).getroot()
+        return [entry.find(f"{atom_ns}title").text for entry in atom.iter(f"{atom_ns}entry")]
+
+    def build(self):
+        site = SiteFeeds(self.store_path, self.dest, "https://example.com")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_incremental(self.content, self.template, self.dest, self.manifest, feeds=site)
+        return site
+
+    def test_full_build(self):
+        site = SiteFeeds(self.store_path, self.dest, "https://example.com")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.dest, verbose=False, feeds=site)
+        self.assertEqual(self.titles(), ["First post", "Home"])
+
+    def test_incremental_updates(self):
+        self.build()
+        self.assertEqual(self.build().written, 0)
+        self.write_page("index.md", "# Welcome home\n\nWelcome.\n", 3000)
+        self.assertEqual(self.build().written, 3)
+        self.assertEqual(self.titles(), ["Welcome home", "First post"])
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertEqual(self.titles(), ["Welcome home"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,21 @@
+import io
+import os
+import tempfile
 import unittest
+from contextlib import redirect_stdout
 
-from gencontent import extract_title
+import gencontent
+from gencontent import (
+    BuildError,
+    extract_title,
+    find_pages,
+    generate_pages,
+    generate_pages_incremental,
+    render_page,
+)
+from instrument import CacheStats, PipelineStats
+from manifest import load_manifest
+from template import Template
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -46,5 +61,288 @@ no title
             pass
 
 
+class TestRenderPage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "page.md")
+        self.dest = os.path.join(self.tmp.name, "out", "page.html")
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, markdown):
+        with open(self.source, "w") as f:
+            f.write(markdown)
+        render_page(self.source, self.template, self.dest)
+        with open(self.dest) as f:
+            return f.read()
+
+    def test_title_after_content(self):
+        html = self.render("intro\n\n# Title\n\nbody")
+        self.assertEqual(html, "<title>Title</title><div><p>intro</p><h1>Title</h1><p>body</p></div>")
+
+    def test_fenced_code_with_blank_lines(self):
+        html = self.render("# T\n\n```\na\n\nb\n```\n")
+        self.assertEqual(html, "<title>T</title><div><h1>T</h1><pre><code>a\n\nb\n</code></pre></div>")
+
+    def test_fence_closed_on_its_own_line(self):
+        html = self.render("# T\n\n```npm install```\n\nSome para\n\n## Heading\n\n* a\n* b")
+        self.assertEqual(
+            html,
+            "<title>T</title><div><h1>T</h1><p><code>npm install</code></p><p>Some para</p>"
+            "<h2>Heading</h2><ul><li>a</li><li>b</li></ul></div>",
+        )
+
+    def test_no_title(self):
+        with self.assertRaises(Exception):
+            self.render("no title\n")
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_invalid_block_leaves_no_output(self):
+        with self.assertRaises(ValueError):
+            self.render("# T\n\nunclosed **bold\n")
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_mmap_path_matches_line_path(self):
+        markdown = "intro\n\n# Caf\u00e9\n\n```\na\n\nb\n```\n\n* one\n* **two**\n\n\n\n> quote\n"
+        expected = self.render(markdown)
+        old_threshold = gencontent.mmap_threshold
+        gencontent.mmap_threshold = 1
+        try:
+            self.assertEqual(self.render(markdown), expected)
+            with open(self.source, "wb") as f:
+                f.write(markdown.replace("\n", "\r\n").encode())
+            render_page(self.source, self.template, self.dest)
+            with open(self.dest) as f:
+                self.assertEqual(f.read(), expected)
+            with self.assertRaises(Exception):
+                self.render("no title\n")
+            markdown = "# T\n\n```npm install```\n\nSome para\n\n```\nx\n\ny\n```\n\n* a\n* b"
+            gencontent.mmap_threshold = old_threshold
+            expected = self.render(markdown)
+            gencontent.mmap_threshold = 1
+            self.assertEqual(self.render(markdown), expected)
+            self.assertIn("<p><code>npm install</code></p><p>Some para</p>", expected)
+        finally:
+            gencontent.mmap_threshold = old_threshold
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, "build", "manifest.json")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def build(self):
+        generate_pages_incremental(self.content, self.template, self.public, self.manifest)
+
+    def test_find_pages_sorted(self):
+        pages = find_pages(self.content, self.public)
+        self.assertEqual(
+            [(os.path.relpath(src, self.content), os.path.relpath(dest, self.public)) for src, dest in pages],
+            [("blog/post.md", "blog/post.html"), ("index.md", "index.html")],
+        )
+
+    def test_unchanged_pages_untouched(self):
+        self.build()
+        index = os.path.join(self.public, "index.html")
+        os.utime(index, (0, 0))
+        self.build()
+        self.assertEqual(os.stat(index).st_mtime, 0)
+
+    def test_changed_source_regenerated(self):
+        self.build()
+        post = os.path.join(self.public, "blog", "post.html")
+        os.utime(post, (0, 0))
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Edited")
+        self.build()
+        self.assertEqual(self.read(post), "<title>Edited</title><div><h1>Edited</h1></div>")
+
+    def test_changed_paths_trusted(self):
+        self.build()
+        index_md = os.path.join(self.content, "index.md")
+        self.write(index_md, "# New home")
+        generate_pages_incremental(self.content, self.template, self.public, self.manifest, changed=[])
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "<title>Home</title><div><h1>Home</h1></div>")
+        generate_pages_incremental(self.content, self.template, self.public, self.manifest, changed=[index_md])
+        self.assertEqual(
+            self.read(os.path.join(self.public, "index.html")), "<title>New home</title><div><h1>New home</h1></div>"
+        )
+
+    def test_template_change_regenerates_all(self):
+        self.build()
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        self.build()
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "Home|<div><h1>Home</h1></div>")
+
+    def test_missing_output_regenerated(self):
+        self.build()
+        index = os.path.join(self.public, "index.html")
+        os.remove(index)
+        self.build()
+        self.assertTrue(os.path.exists(index))
+
+    def test_explain_reasons(self):
+        self.build()
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# New home")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            generate_pages_incremental(self.content, self.template, self.public, self.manifest, explain=True)
+        index = os.path.join(self.content, "index.md")
+        post = os.path.join(self.content, "blog", "post.md")
+        self.assertIn(f" * rebuilding {index}: source changed, template changed\n", output.getvalue())
+        self.assertIn(f" * rebuilding {post}: template changed\n", output.getvalue())
+
+    def test_dependency_graph_recorded(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post)")
+        self.build()
+        graph = load_manifest(self.manifest)["graph"]
+        index = os.path.normpath(os.path.join(self.content, "index.md"))
+        post = os.path.normpath(os.path.join(self.content, "blog", "post.md"))
+        self.assertEqual(graph[index], {"page": [post], "template": [os.path.normpath(self.template)]})
+        os.remove(post)
+        self.build()
+        self.assertNotIn(post, load_manifest(self.manifest)["graph"])
+
+    def test_changed_template_trusts_sources(self):
+        self.build()
+        index_md = os.path.join(self.content, "index.md")
+        self.write(index_md, "# New home")
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        generate_pages_incremental(self.content, self.template, self.public, self.manifest, changed=[self.template])
+        # The template change rebuilds every page that uses it, and those pages
+        # are re-hashed, so the unreported source edit is picked up too.
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "New home|<div><h1>New home</h1></div>")
+
+    def test_identical_output_not_rewritten(self):
+        self.build()
+        index = os.path.join(self.public, "index.html")
+        os.utime(index, (0, 0))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n\n")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.build()
+        self.assertIn("Generated 1 page(s)", output.getvalue())
+        self.assertIn("Outputs: 0 written, 1 skipped as identical", output.getvalue())
+        self.assertEqual(os.stat(index).st_mtime, 0)
+        self.assertEqual(self.read(index), "<title>Home</title><div><h1>Home</h1></div>")
+
+    def test_vanished_source_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+
+class TestParallelBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("{{ Title }}|{{ Content }}")
+        os.makedirs(os.path.join(self.content, "sub"))
+        for i in range(6):
+            with open(os.path.join(self.content, "sub" if i % 2 else "", f"p{i}.md"), "w") as f:
+                f.write(f"# Page {i}\n\n* item **{i}**")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, workers, name):
+        public = os.path.join(self.tmp.name, name)
+        generate_pages(find_pages(self.content, public), self.template, workers, verbose=False)
+        return self.outputs(public)
+
+    def outputs(self, public):
+        outputs = {}
+        for dir_path, _, filenames in os.walk(public):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path) as f:
+                    outputs[os.path.relpath(path, public)] = f.read()
+        return outputs
+
+    def test_parallel_matches_serial(self):
+        serial = self.build(1, "serial")
+        parallel = self.build(3, "parallel")
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(serial, parallel)
+
+    def test_inline_cache_stats(self):
+        for i in range(6):
+            with open(os.path.join(self.content, "sub" if i % 2 else "", f"p{i}.md"), "a") as f:
+                f.write("\n\nShared *footer* text")
+        expected = self.build(1, "uncached")
+        for workers in (1, 2):
+            stats = CacheStats("Inline cache", 8)
+            public = os.path.join(self.tmp.name, f"cached{workers}")
+            generate_pages(find_pages(self.content, public), self.template, workers, verbose=False, inline_cache=stats)
+            # 6 pages x (title, list item, footer) lookups; the footer is
+            # parsed once per process and hit on every other page.
+            self.assertEqual(stats.hits + stats.misses, 18)
+            self.assertGreaterEqual(stats.hits, 6 - workers)
+            self.assertEqual(self.build(1, f"cached{workers}"), expected)
+
+    def test_errors_aggregated(self):
+        for name in ("bad1.md", "bad2.md"):
+            with open(os.path.join(self.content, name), "w") as f:
+                f.write("no title here")
+        with self.assertRaises(BuildError) as cm:
+            self.build(2, "public")
+        failed = [os.path.basename(path) for path, _ in cm.exception.failures]
+        self.assertEqual(failed, ["bad1.md", "bad2.md"])
+        self.assertIn("No title found", str(cm.exception))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "public", "p0.html")))
+
+    def test_pipeline_matches_serial(self):
+        serial = self.build(1, "serial")
+        stats = PipelineStats(2)
+        public = os.path.join(self.tmp.name, "pipeline")
+        generate_pages(find_pages(self.content, public), self.template, verbose=False, pipeline=stats)
+        self.assertEqual(self.outputs(public), serial)
+        self.assertEqual(stats.pages, 6)
+        self.assertGreater(stats.wall, 0)
+        self.assertGreater(stats.seconds["parse"], 0)
+
+    def test_pipeline_splits_lines_like_serial(self):
+        with open(os.path.join(self.content, "p0.md"), "w") as f:
+            f.write("# Page 0\n\none two and\x0cthree\nfour\x85five")
+        serial = self.build(1, "serial")
+        public = os.path.join(self.tmp.name, "pipeline")
+        generate_pages(find_pages(self.content, public), self.template, verbose=False, pipeline=PipelineStats(2))
+        self.assertEqual(self.outputs(public), serial)
+
+    def test_pipeline_errors_aggregated(self):
+        with open(os.path.join(self.content, "bad.md"), "w") as f:
+            f.write("no title here")
+        public = os.path.join(self.tmp.name, "public")
+        with self.assertRaises(BuildError) as cm:
+            generate_pages(find_pages(self.content, public), self.template, verbose=False, pipeline=PipelineStats(2))
+        self.assertEqual([os.path.basename(path) for path, _ in cm.exception.failures], ["bad.md"])
+        self.assertTrue(os.path.exists(os.path.join(public, "p0.html")))
+
+
 if __name__ == "__main__":
     unittest.main(exit=False)
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
@@ -81,6 +82,10 @@ class TestHTMLNode(unittest.TestCase):
         expected = "HTMLNode(p, Hello, world!, children=None, {'key': 'href', 'value': 'target'})"
         self.assertEqual(expected, repr(node))
 
+    def test_slots(self):
+        for node in (HTMLNode(), LeafNode("p", "text"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_HTMLNode_none(self):
         node = HTMLNode()
         expected = "HTMLNode(None, None, children=None, None)"
@@ -171,6 +176,33 @@ class TestParentNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "Text "), LeafNode("a", "link", {"href": "/x"})]),
+                ParentNode("pre", [ParentNode("code", [LeafNode(None, "code")])]),
+            ],
+        )
+        chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), node.to_html())
+        self.assertEqual(
+            node.to_html(),
+            '<div><p>Text <a href="/x">link</a></p><pre><code>code</code></pre></div>',
+        )
+
+    def test_write_html(self):
+        node = ParentNode(self.tag, self.children)
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), "<p><b>Bold text</b><i>italic text</i></p>")
+
+    def test_iter_html_no_tag(self):
+        node = ParentNode(None, self.children)
+        with self.assertRaises(ValueError):
+            list(node.iter_html())
+
     def test_repr(self):
         node = ParentNode(tag="p", children=f"{self.children}", props={"key": "href", "value": "target"})
         expected = "ParentNode(p, children=[LeafNode(b, Bold text, None), LeafNode(i, italic text, None)], {'key': 'href', 'value': 'target'})"
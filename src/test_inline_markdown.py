@@ -1,11 +1,17 @@
+import random
 import unittest
 from inline_markdown import (
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    text_to_textnodes_multipass,
     extract_markdown_links,
     extract_markdown_images,
+    image_pattern,
+    iter_images,
+    iter_links,
+    link_pattern,
 )
 
 from textnode import (
@@ -364,6 +370,92 @@ class TestTexttoTextNode(unittest.TestCase):
         ]
         self.assertEqual(result, expected)
 
+    def test_multiple_links(self):
+        text = "a [x](1) b [y](2) c"
+        expected = [
+            TextNode("a ", text_type_text),
+            TextNode("x", text_type_link, "1"),
+            TextNode(" b ", text_type_text),
+            TextNode("y", text_type_link, "2"),
+            TextNode(" c", text_type_text),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+        self.assertEqual(text_to_textnodes_multipass(text), expected)
+
+    def test_delimiter_priority(self):
+        self.assertEqual(
+            text_to_textnodes("**a***b* *c`d*"),
+            [
+                TextNode("a", text_type_bold),
+                TextNode("b", text_type_italic),
+                TextNode(" ", text_type_text),
+                TextNode("c`d", text_type_italic),
+            ],
+        )
+
+    def test_unclosed_delimiters(self):
+        for text in ("a **b", "*a", "`a", "`a*b*`", "*a**b**c*"):
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+
+
+class TestSinglePassDifferential(unittest.TestCase):
+    fragments = [
+        "plain words",
+        " ",
+        "x",
+        "**bold**",
+        "**bold words**",
+        "*italic*",
+        "`code`",
+        "`co*de`",
+        "**b*o*ld**",
+        "*it`al*",
+        "![alt text](https://img/a.png)",
+        "![](empty-alt.png)",
+        "[link text](https://example.com/page)",
+        "[](empty)",
+        "[not a link]",
+        "(parenthesised)",
+        "!",
+        "[",
+        "]",
+        "*",
+        "**",
+        "`",
+        "****",
+    ]
+
+    def test_matches_multipass(self):
+        rng = random.Random(1234)
+        for _ in range(5000):
+            text = "".join(rng.choice(self.fragments) for _ in range(rng.randint(0, 12)))
+            try:
+                expected = text_to_textnodes_multipass(text)
+            except ValueError:
+                with self.assertRaises(ValueError, msg=text):
+                    text_to_textnodes(text)
+                continue
+            self.assertEqual(text_to_textnodes(text), expected, msg=text)
+
+
+class TestBracketScanDifferential(unittest.TestCase):
+    alphabet = ["[", "]", "(", ")", "!", "a", " ", "\n", "-", "é"]
+
+    def test_matches_patterns(self):
+        rng = random.Random(99)
+        for _ in range(5000):
+            text = "".join(rng.choice(self.alphabet) for _ in range(rng.randint(0, 24)))
+            for scan, pattern in ((iter_images, image_pattern), (iter_links, link_pattern)):
+                expected = [(m.start(), m.end(), m.group(1), m.group(2)) for m in pattern.finditer(text)]
+                self.assertEqual(list(scan(text)), expected, msg=repr(text))
+
+    def test_unmatched_bracket_runs(self):
+        for text in ("[" * 10000 + "](x)", "[](" * 10000, "![" * 10000 + "a](b)", "[a]" * 10000):
+            expected = [(m.start(), m.end(), m.group(1), m.group(2)) for m in link_pattern.finditer(text[:300])]
+            self.assertEqual(list(iter_links(text[:300])), expected)
+            self.assertLessEqual(len(list(iter_links(text))), 1)
+
 
 if __name__ == "__main__":
 	unittest.main(exit=False)
@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import unittest
+
+from gencontent import find_pages, generate_pages
+from instrument import BuildProfile, PageTimer, PipelineStats, percentile, stages
+
+
+def record(path, seconds):
+    timer = PageTimer(path)
+    for stage in stages:
+        timer.add(stage, seconds / len(stages))
+    return timer.to_record()
+
+
+class TestBuildProfile(unittest.TestCase):
+    def test_page_timer_measure(self):
+        timer = PageTimer("a.md")
+        with timer.measure("read", allocs="read"):
+            data = [object() for _ in range(100)]
+        self.assertGreater(timer.seconds["read"], 0)
+        self.assertIn("read", timer.allocs)
+        self.assertEqual(len(data), 100)
+
+    def test_percentile(self):
+        values = list(range(101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 90), 3)
+
+    def test_summary_lists_slowest_first(self):
+        profile = BuildProfile()
+        for i in range(5):
+            profile.add(record(f"page{i}.md", (i + 1) / 1000))
+        summary = profile.summary(top=2)
+        self.assertIn("Build profile: 5 page(s)", summary)
+        self.assertIn("p50", summary)
+        slowest = summary.split("slowest 2 page(s):\n")[1].splitlines()
+        self.assertEqual(len(slowest), 2)
+        self.assertIn("page4.md", slowest[0])
+        self.assertIn("page3.md", slowest[1])
+
+    def test_empty_summary(self):
+        self.assertEqual(BuildProfile().summary(), "Build profile: no pages generated")
+
+    def test_write_trace(self):
+        profile = BuildProfile()
+        profile.add(record("a.md", 0.005))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            profile.write_trace(path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+        self.assertEqual(len(events), 1 + len(stages))
+        self.assertEqual(events[0]["name"], "a.md")
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+        self.assertAlmostEqual(sum(e["dur"] for e in events[1:]), events[0]["dur"])
+
+    def test_profiled_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Title }}|{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Title\n\nSome **bold** text")
+            public = os.path.join(tmp, "public")
+            profile = BuildProfile()
+            generate_pages(find_pages(content, public), template, verbose=False, profile=profile)
+            with open(os.path.join(public, "index.html")) as f:
+                self.assertEqual(f.read(), "Title|<div><h1>Title</h1><p>Some <b>bold</b> text</p></div>")
+        self.assertEqual(len(profile.records), 1)
+        seconds = profile.records[0]["seconds"]
+        self.assertEqual(set(seconds), set(stages))
+        self.assertGreater(seconds["inline"], 0)
+        self.assertGreater(seconds["render"], 0)
+
+
+class TestPipelineStats(unittest.TestCase):
+    def test_summary_reports_overlap(self):
+        stats = PipelineStats(4)
+        stats.pages = 10
+        stats.add("read", 0.5)
+        stats.add("parse", 1.0)
+        stats.add("write", 0.5)
+        stats.wall = 1.25
+        summary = stats.summary()
+        self.assertIn("10 page(s), 4 in flight", summary)
+        self.assertIn("overlap 1.60x", summary)
+        self.assertIn("75.0% of I/O time hidden", summary)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
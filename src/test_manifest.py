@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from manifest import (
+    GENERATOR_VERSION,
+    hash_file,
+    load_manifest,
+    save_manifest,
+    page_entry,
+    remove_output,
+)
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manifest_path = os.path.join(self.tmp.name, "build", "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file(self):
+        path = os.path.join(self.tmp.name, "a.md")
+        with open(path, "w") as f:
+            f.write("# hello")
+        other = os.path.join(self.tmp.name, "b.md")
+        with open(other, "w") as f:
+            f.write("# hello!")
+        self.assertEqual(hash_file(path), hash_file(path))
+        self.assertNotEqual(hash_file(path), hash_file(other))
+
+    def test_missing_manifest(self):
+        manifest = load_manifest(self.manifest_path)
+        self.assertEqual(
+            manifest,
+            {
+                "generator": GENERATOR_VERSION,
+                "pages": {},
+                "assets": {},
+                "graph": {},
+                "outputs": {},
+                "fingerprints": {},
+                "compressed": {},
+            },
+        )
+
+    def test_round_trip(self):
+        manifest = load_manifest(self.manifest_path)
+        manifest["pages"]["content/index.md"] = page_entry("abc", "def", "public/index.html")
+        save_manifest(self.manifest_path, manifest)
+        self.assertEqual(load_manifest(self.manifest_path), manifest)
+
+    def test_other_generator_version_discarded(self):
+        manifest = {"generator": "old", "pages": {"a.md": {}}}
+        save_manifest(self.manifest_path, manifest)
+        self.assertEqual(load_manifest(self.manifest_path)["pages"], {})
+
+    def test_missing_sections_added(self):
+        save_manifest(self.manifest_path, {"generator": GENERATOR_VERSION, "pages": {"a.md": {}}})
+        manifest = load_manifest(self.manifest_path)
+        self.assertEqual(manifest["pages"], {"a.md": {}})
+        self.assertEqual(manifest["assets"], {})
+
+    def test_remove_output_prunes_empty_dirs(self):
+        public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(public, "a", "b"))
+        path = os.path.join(public, "a", "b", "page.html")
+        open(path, "w").close()
+        remove_output(path, public)
+        self.assertEqual(os.listdir(public), [])
+
+    def test_corrupt_manifest_discarded(self):
+        os.makedirs(os.path.dirname(self.manifest_path))
+        with open(self.manifest_path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(load_manifest(self.manifest_path)["pages"], {})
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,128 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from corpus import make_page, shapes
+from gencontent import generate_pages_incremental, parse_page
+from minify import HTMLMinifier, minify_chunks, minify_html
+from template import Template
+
+page = """<!DOCTYPE html>
+<html>
+<head>
+    <title> Page </title>
+</head>
+<body>
+    <article>
+        <h1>A   heading</h1>
+        <p>Some <b>bold</b> <i>words</i>,
+        wrapped.</p>
+        <pre><code>def f():
+    return  1
+</code></pre>
+        <p>Call <code>f(  )</code> if a < b.</p>
+    </article>
+</body>
+</html>
+"""
+
+
+class TestMinify(unittest.TestCase):
+    def test_minify_page(self):
+        self.assertEqual(
+            minify_html(page),
+            "<!DOCTYPE html><html><head><title>Page</title></head><body><article><h1>A heading</h1>"
+            "<p>Some <b>bold</b> <i>words</i>, wrapped.</p><pre><code>def f():\n    return  1\n</code></pre>"
+            "<p>Call <code>f(  )</code> if a < b.</p></article></body></html>",
+        )
+
+    def test_piece_boundaries(self):
+        for spaces in (False, True):
+            expected = minify_html(page, spaces)
+            for size in (1, 2, 3, 5, 8, 13):
+                minifier = HTMLMinifier(spaces)
+                minified = [minifier.feed(page[i : i + size]) for i in range(0, len(page), size)]
+                self.assertEqual("".join(minified) + minifier.close(), expected, (spaces, size))
+
+    def test_stream_keeps_single_spaces(self):
+        # Streams only collapse runs; single spaces are left for the
+        # template, which is minified in full once.
+        self.assertEqual("".join(minify_chunks(["<p> a ", "</p>\n<p>", "b  c</p>"])), "<p> a </p><p>b c</p>")
+        self.assertEqual("".join(minify_chunks([""] * 100 + ["<p>a  b</p>"])), "<p>a b</p>")
+
+    def test_rendered_chunks_match_whole_document(self):
+        # Chunks straight from rendering mostly take the pass-through path;
+        # the result must be what scanning the joined document gives.
+        rng = random.Random(0)
+        for shape, spec in shapes.items():
+            title, content = parse_page(make_page(rng, "Page", 40, spec["mix"]).splitlines(keepends=True))
+            chunks = list(content)
+            self.assertEqual("".join(minify_chunks(chunks)), minify_html("".join(chunks)), shape)
+
+    def test_inline_spacing(self):
+        self.assertEqual(minify_html("<a href='x'>one</a>\n  <a>two</a>"), "<a href='x'>one</a> <a>two</a>")
+        self.assertEqual(minify_html("<p>\n  <img src=a> text\n</p>"), "<p><img src=a> text</p>")
+        self.assertEqual(minify_html("<li> a  b </li>"), "<li>a  b</li>")
+
+    def test_tags_passed_through(self):
+        html = '<img alt="a  >  b"\n     src="x.png">  <!--  note  -->  <span>y</span>'
+        self.assertEqual(minify_html(html), '<img alt="a  >  b"\n     src="x.png"><!--  note  --><span>y</span>')
+
+    def test_preserved_elements(self):
+        html = "<textarea>  a\n  b </textarea>\n<script>if (a  <b) {}</script>\n<PRE>  x  </PRE> <p> y </p>"
+        self.assertEqual(
+            minify_html(html), "<textarea>  a\n  b </textarea> <script>if (a  <b) {}</script><PRE>  x  </PRE><p>y</p>"
+        )
+
+    def test_template(self):
+        template = Template("<title> {{ Title }} </title>\n<main>\n  {{ Content }}\n</main>\n", minify=True)
+        rendered = template.render({"Title": "T", "Content": iter(["<p>a", "\n b</p>"])})
+        self.assertEqual(rendered, "<title>T</title><main><p>a b</p></main>")
+        fp = io.StringIO()
+        template.write(fp, {"Title": "T", "Content": "<p>x</p>"})
+        self.assertEqual(fp.getvalue(), "<title>T</title><main><p>x</p></main>")
+
+
+class TestMinifiedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.dest = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, "manifest.json")
+        os.makedirs(self.content)
+        with open(self.template, "w") as f:
+            f.write("<html>\n  <title> {{ Title }} </title>\n  <body>\n    {{ Content }}\n  </body>\n</html>\n")
+        with open(os.path.join(self.content, "index.md"), "w") as f:
+            f.write("# Home\n\nSome  text\nover two lines.\n\n```\nkeep   this\n```\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, minify):
+        with redirect_stdout(io.StringIO()):
+            return generate_pages_incremental(self.content, self.template, self.dest, self.manifest, minify=minify)
+
+    def read(self):
+        with open(os.path.join(self.dest, "index.html")) as f:
+            return f.read()
+
+    def test_toggle_rebuilds(self):
+        self.build(False)
+        plain = self.read()
+        self.assertEqual(self.build(True), 1)
+        minified = self.read()
+        self.assertLess(len(minified), len(plain))
+        self.assertEqual(minify_html(plain), minified)
+        self.assertIn("<pre><code>keep   this\n</code></pre>", minified)
+        self.assertEqual(self.build(True), 0)
+        self.assertEqual(self.build(False), 1)
+        self.assertEqual(self.read(), plain)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from output import OutputLog, write_output
+
+
+class TestWriteOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "out", "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.dest) as f:
+            return f.read()
+
+    def test_writes_and_hashes(self):
+        output_hash, written = write_output(self.dest, lambda fp: fp.write("café"))
+        self.assertTrue(written)
+        self.assertEqual(self.read(), "café")
+        self.assertEqual(output_hash, hashlib.sha256("café".encode()).hexdigest())
+        self.assertEqual(os.listdir(os.path.dirname(self.dest)), ["page.html"])
+
+    def test_skips_identical_output(self):
+        output_hash, _ = write_output(self.dest, lambda fp: fp.write("same"))
+        os.utime(self.dest, (0, 0))
+        self.assertEqual(write_output(self.dest, lambda fp: fp.write("same"), output_hash), (output_hash, False))
+        self.assertEqual(os.stat(self.dest).st_mtime, 0)
+        self.assertEqual(os.listdir(os.path.dirname(self.dest)), ["page.html"])
+
+    def test_rewrites_missing_output(self):
+        output_hash, _ = write_output(self.dest, lambda fp: fp.write("same"))
+        os.remove(self.dest)
+        self.assertTrue(write_output(self.dest, lambda fp: fp.write("same"), output_hash)[1])
+        self.assertEqual(self.read(), "same")
+
+    def test_failure_keeps_previous_output(self):
+        write_output(self.dest, lambda fp: fp.write("good"))
+
+        def fail(fp):
+            fp.write("partial")
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            write_output(self.dest, fail)
+        self.assertEqual(self.read(), "good")
+        self.assertEqual(os.listdir(os.path.dirname(self.dest)), ["page.html"])
+
+
+class TestOutputLog(unittest.TestCase):
+    def test_counts(self):
+        log = OutputLog({"a.html": "old"})
+        log.add("a.html", "new", True)
+        log.add("b.html", "same", False)
+        log.remove("missing.html")
+        self.assertEqual(log.hashes, {"a.html": "new", "b.html": "same"})
+        self.assertEqual(log.summary(), "Outputs: 1 written, 1 skipped as identical")
+
+
+if __name__ == "__main__":
+    unittest.main()
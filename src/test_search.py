@@ -0,0 +1,244 @@
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from gencontent import generate_pages_incremental, generate_pages_recursive
+from instrument import PipelineStats
+from search import SearchIndex, TermCollector, decode_postings, encode_postings, page_url, shard_name
+
+
+class TestTermCollector(unittest.TestCase):
+    def collect(self, chunks):
+        terms = TermCollector()
+        self.assertEqual(list(terms.tee(chunks)), chunks)
+        return terms.counts
+
+    def test_tags_stripped_and_terms_counted(self):
+        counts = self.collect(['<p>The <a href="/x">Ring</a> and the ring.</p>', "<pre><code>x = 1</code></pre>"])
+        self.assertEqual(counts, {"the": 2, "ring": 2, "and": 1})
+
+    def test_tag_split_across_chunks(self):
+        html = '<p>Frodo <a href="/shire">went</a> east</p><blockquote>Gandalf</blockquote>'
+        whole = self.collect([html])
+        for size in (1, 3, 7):
+            chunks = [html[i : i + size] for i in range(0, len(html), size)]
+            self.assertEqual(self.collect(chunks), whole)
+
+    def test_bare_less_than_is_text(self):
+        self.assertEqual(self.collect(["<p>a < b and 3 <4 hobbits</p>"]), {"and": 1, "hobbits": 1})
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.tmp.name, "build", "search.json")
+        self.dest = os.path.join(self.tmp.name, "public")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def index(self):
+        return SearchIndex(self.store_path, self.dest)
+
+    def read(self, filename):
+        with open(os.path.join(self.dest, "search", filename)) as f:
+            return json.load(f)
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join(self.dest, "index.html"), self.dest), "/")
+        self.assertEqual(page_url(os.path.join(self.dest, "blog", "index.html"), self.dest), "/blog/")
+        self.assertEqual(page_url(os.path.join(self.dest, "blog", "post.html"), self.dest), "/blog/post.html")
+
+    def test_postings_round_trip(self):
+        entries = [(7, 1), (0, 3), (12, 2)]
+        self.assertEqual(encode_postings(list(entries)), [0, 3, 7, 1, 5, 2])
+        self.assertEqual(decode_postings([0, 3, 7, 1, 5, 2]), sorted(entries))
+
+    def test_shards_by_prefix(self):
+        index = self.index()
+        index.add("a.md", os.path.join(self.dest, "index.html"), "A", {"ring": 2, "rivendell": 1})
+        index.add("b.md", os.path.join(self.dest, "b.html"), "B", {"ring": 1, "élan": 1})
+        index.write()
+        self.assertEqual(self.read("docs.json"), {"0": ["/", "A"], "1": ["/b.html", "B"]})
+        self.assertEqual(self.read(shard_name("ri") + ".json"), {"ring": [0, 2, 1, 1], "rivendell": [0, 1]})
+        self.assertEqual(self.read(shard_name("él") + ".json"), {"élan": [1, 1]})
+
+    def test_ids_stable_and_unchanged_shards_kept(self):
+        index = self.index()
+        index.add("a.md", os.path.join(self.dest, "a.html"), "A", {"ring": 1, "shire": 1})
+        index.add("b.md", os.path.join(self.dest, "b.html"), "B", {"mordor": 1})
+        index.write()
+        index.save()
+        shire_path = os.path.join(self.dest, "search", shard_name("sh") + ".json")
+        mordor_path = os.path.join(self.dest, "search", shard_name("mo") + ".json")
+        os.utime(shire_path, (0, 0))
+
+        index = self.index()
+        index.retain(["b.md"])
+        index.add("b.md", os.path.join(self.dest, "b.html"), "B", {"mount": 1})
+        index.add("c.md", os.path.join(self.dest, "c.html"), "C", {"mordor": 1})
+        index.write()
+        self.assertEqual(self.read("docs.json"), {"1": ["/b.html", "B"], "2": ["/c.html", "C"]})
+        self.assertEqual(self.read(shard_name("mo") + ".json"), {"mordor": [2, 1], "mount": [1, 1]})
+        self.assertFalse(os.path.exists(shire_path))
+        self.assertTrue(os.path.exists(mordor_path))
+
+    def test_unchanged_shard_not_rewritten(self):
+        index = self.index()
+        index.add("a.md", os.path.join(self.dest, "a.html"), "A", {"ring": 1})
+        index.add("b.md", os.path.join(self.dest, "b.html"), "B", {"shire": 1})
+        index.write()
+        index.save()
+        ring_path = os.path.join(self.dest, "search", shard_name("ri") + ".json")
+        os.utime(ring_path, (0, 0))
+
+        index = self.index()
+        index.add("b.md", os.path.join(self.dest, "b.html"), "B", {"shire": 2})
+        index.write()
+        self.assertEqual(os.path.getmtime(ring_path), 0)
+        self.assertEqual(self.read(shard_name("sh") + ".json"), {"shire": [1, 2]})
+
+    def test_patched_shards_match_fresh_index(self):
+        rng = random.Random(0)
+        words = ["ring", "rivendell", "shire", "shadow", "mordor", "mount", "elf", "ent"]
+        pages = {}
+
+        def edit():
+            for _ in range(5):
+                from_path = f"p{rng.randrange(12)}.md"
+                if rng.random() < 0.2:
+                    pages.pop(from_path, None)
+                else:
+                    pages[from_path] = {w: rng.randint(1, 3) for w in rng.sample(words, rng.randint(1, 4))}
+
+        def build(store_path, dest, changed_only):
+            index = SearchIndex(store_path, dest)
+            index.retain(pages)
+            for from_path, counts in sorted(pages.items()):
+                if not changed_only or index.store["pages"].get(from_path, {}).get("terms") != counts:
+                    index.add(from_path, os.path.join(dest, from_path[:-3] + ".html"), from_path, dict(counts))
+            index.write()
+            index.save()
+            return index
+
+        def contents(dest):
+            dir_path = os.path.join(dest, "search")
+            with open(os.path.join(dir_path, "docs.json")) as f:
+                docs = json.load(f)
+            terms = {}
+            for filename in os.listdir(dir_path):
+                if filename != "docs.json":
+                    with open(os.path.join(dir_path, filename)) as f:
+                        for term, flat in json.load(f).items():
+                            terms[term] = sorted((docs[str(i)][1], count) for i, count in decode_postings(flat))
+            return sorted(title for _, title in docs.values()), terms
+
+        for round in range(10):
+            edit()
+            build(self.store_path, self.dest, True)
+            fresh = os.path.join(self.tmp.name, f"fresh{round}")
+            build(os.path.join(fresh, "search.json"), fresh, False)
+            self.assertEqual(contents(self.dest), contents(fresh))
+
+    def test_missing_or_modified_shard_rebuilt(self):
+        index = self.index()
+        index.add("a.md", os.path.join(self.dest, "a.html"), "A", {"ring": 1, "shire": 1})
+        index.add("b.md", os.path.join(self.dest, "b.html"), "B", {"ring": 2})
+        index.write()
+        index.save()
+        os.remove(os.path.join(self.dest, "search", shard_name("sh") + ".json"))
+        with open(os.path.join(self.dest, "search", shard_name("ri") + ".json"), "w") as f:
+            f.write('{"ring": [0, 9]}')
+
+        index = self.index()
+        index.add("b.md", os.path.join(self.dest, "b.html"), "B", {"ring": 3})
+        index.write()
+        self.assertEqual(self.read(shard_name("sh") + ".json"), {"shire": [0, 1]})
+        self.assertEqual(self.read(shard_name("ri") + ".json"), {"ring": [0, 1, 1, 3]})
+
+
+class TestSearchBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.dest = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, "manifest.json")
+        self.store_path = os.path.join(root, "search.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.write_page("index.md", "# Home\n\nWelcome to the Shire.\n")
+        self.write_page("blog/index.md", "# Blog\n\nNews from **Rivendell**.\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, rel_path, markdown):
+        with open(os.path.join(self.content, rel_path), "w") as f:
+            f.write(markdown)
+
+    def index(self):
+        return SearchIndex(self.store_path, self.dest)
+
+    def build(self, **kwargs):
+        index = self.index()
+        with redirect_stdout(io.StringIO()):
+            generate_pages_incremental(
+                self.content, self.template, self.dest, self.manifest, search_index=index, **kwargs
+            )
+        return index
+
+    def urls(self, term):
+        with open(os.path.join(self.dest, "search", "docs.json")) as f:
+            docs = json.load(f)
+        shard_path = os.path.join(self.dest, "search", shard_name(term[:2]) + ".json")
+        if not os.path.exists(shard_path):
+            return []
+        with open(shard_path) as f:
+            postings = json.load(f).get(term, [])
+        return sorted(docs[str(doc_id)][0] for doc_id, _ in decode_postings(postings))
+
+    def test_full_build_indexes_body_not_template(self):
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.dest, verbose=False, search_index=self.index())
+        self.assertEqual(self.urls("rivendell"), ["/blog/"])
+        self.assertEqual(self.urls("shire"), ["/"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search", shard_name("ti") + ".json")))
+
+    def test_incremental_reindexes_changed_pages_only(self):
+        self.assertEqual(self.build().indexed, 2)
+        self.assertEqual(self.build().indexed, 0)
+        self.write_page("blog/index.md", "# Blog\n\nNews from the Shire.\n")
+        self.assertEqual(self.build().indexed, 1)
+        self.assertEqual(self.urls("shire"), ["/", "/blog/"])
+        self.assertEqual(self.urls("rivendell"), [])
+
+    def test_pipeline_and_workers_match_serial(self):
+        self.build()
+        with open(os.path.join(self.dest, "search", "docs.json")) as f:
+            expected = f.read()
+        os.remove(self.store_path)
+        self.build(pipeline=PipelineStats(2))
+        self.assertEqual(self.urls("shire"), ["/"])
+        os.remove(self.store_path)
+        self.build(workers=2)
+        with open(os.path.join(self.dest, "search", "docs.json")) as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(self.urls("rivendell"), ["/blog/"])
+
+    def test_removed_page_dropped(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.build()
+        self.assertEqual(self.urls("rivendell"), [])
+        self.assertEqual(self.urls("shire"), ["/"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import io
+import os
+import tempfile
+import unittest
+
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.literals, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title> {{ Title }} </title>{{ Content }}")
+        html = template.render({"Title": "Hi", "Content": "<p>body</p>"})
+        self.assertEqual(html, "<title> Hi </title><p>body</p>")
+
+    def test_write(self):
+        template = Template("a{{ X }}b{{ Y }}c")
+        out = io.StringIO()
+        template.write(out, {"X": "1", "Y": "2"})
+        self.assertEqual(out.getvalue(), "a1b2c")
+
+    def test_arbitrary_and_repeated_slots(self):
+        template = Template("{{Name}} / {{  Name  }} / {{ Date }}")
+        self.assertEqual(template.slots, ["Name", "Name", "Date"])
+        self.assertEqual(template.render({"Name": "n", "Date": "d"}), "n / n / d")
+
+    def test_chunked_value(self):
+        template = Template("<div>{{ Content }}</div>")
+        out = io.StringIO()
+        template.write(out, {"Content": iter(["<p>", "a", "</p>"])})
+        self.assertEqual(out.getvalue(), "<div><p>a</p></div>")
+
+    def test_missing_slot_kept(self):
+        template = Template("{{ Title }}{{ Unknown }}")
+        self.assertEqual(template.render({"Title": "t"}), "t{{ Unknown }}")
+
+    def test_no_slots(self):
+        template = Template("plain")
+        self.assertEqual(template.render({}), "plain")
+
+    def test_value_not_rescanned(self):
+        template = Template("{{ Title }}|{{ Content }}")
+        html = template.render({"Title": "{{ Content }}", "Content": "c"})
+        self.assertEqual(html, "{{ Content }}|c")
+
+    def test_load_template(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            self.assertEqual(load_template(path).render({"Title": "x"}), "<h1>x</h1>")
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -42,6 +42,12 @@ class TestTextNode(unittest.TestCase):
 			"TextNode(This is a text node, text, https://www.boot.dev)", repr(node)
 		)
 
+	def test_slots(self):
+		node = TextNode("This is a text node", text_type_text)
+		self.assertFalse(hasattr(node, "__dict__"))
+		with self.assertRaises(AttributeError):
+			node.extra = True
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text_node_text(self):
         text_node = TextNode("text", text_type_text)
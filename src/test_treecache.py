@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+import treecache
+from assets import AssetMap
+from gencontent import find_pages, generate_pages, render_page
+from template import Template
+from treecache import TreeCache
+
+
+class TestTreeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TreeCache(os.path.join(self.tmp.name, "trees"), 1 << 20)
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}")
+        self.source = os.path.join(self.tmp.name, "page.md")
+        self.dest = os.path.join(self.tmp.name, "out", "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_source(self, markdown):
+        with open(self.source, "w") as f:
+            f.write(markdown)
+
+    def render(self):
+        _, _, hit, _ = render_page(self.source, self.template, self.dest, self.cache)
+        with open(self.dest) as f:
+            return hit, f.read()
+
+    def test_miss_then_hit(self):
+        self.write_source("# Title\n\nsome **bold** text")
+        miss = self.render()
+        hit = self.render()
+        self.assertEqual(miss[0], False)
+        self.assertEqual(hit[0], True)
+        self.assertEqual(hit[1], miss[1])
+        self.assertEqual(
+            hit[1], "<title>Title</title><div><h1>Title</h1><p>some <b>bold</b> text</p></div>"
+        )
+
+    def test_hit_uses_current_template(self):
+        self.write_source("# Title\n\nbody")
+        self.render()
+        self.template = Template("<h2>{{ Title }}</h2>{{ Content }}")
+        hit, html = self.render()
+        self.assertTrue(hit)
+        self.assertEqual(html, "<h2>Title</h2><div><h1>Title</h1><p>body</p></div>")
+
+    def test_changed_source_misses(self):
+        self.write_source("# Title\n\nbody")
+        self.render()
+        self.write_source("# Title\n\nnew body")
+        hit, html = self.render()
+        self.assertFalse(hit)
+        self.assertIn("new body", html)
+
+    def test_key_includes_parser_version(self):
+        self.write_source("# Title")
+        key = self.cache.key(self.source)
+        old_version = treecache.PARSER_VERSION
+        treecache.PARSER_VERSION = old_version + "-next"
+        try:
+            self.assertNotEqual(self.cache.key(self.source), key)
+        finally:
+            treecache.PARSER_VERSION = old_version
+
+    def test_key_includes_referenced_assets_only(self):
+        self.write_source("# Title\n\n![A](/a.png?v=1) and [home](/)")
+        urls = {"/a.png": "/a.11111111.png", "/b.png": "/b.22222222.png"}
+        paths = {"/a.png": "static/a.png", "/b.png": "static/b.png"}
+
+        def key(hashes):
+            cache = TreeCache(self.cache.dir_path, self.cache.max_bytes, assets=AssetMap(urls, hashes, paths))
+            return cache.key(self.source)
+
+        key_a1 = key({"static/a.png": "1", "static/b.png": "1"})
+        self.assertEqual(key({"static/a.png": "1", "static/b.png": "2"}), key_a1)
+        self.assertNotEqual(key({"static/a.png": "2", "static/b.png": "1"}), key_a1)
+
+    def test_failed_page_is_not_cached(self):
+        self.write_source("no title here")
+        with self.assertRaises(Exception):
+            render_page(self.source, self.template, self.dest, self.cache)
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_prune_evicts_least_recently_used(self):
+        paths = []
+        for i in range(3):
+            self.write_source(f"# Page {i}\n\n" + "text " * 100)
+            self.render()
+            key = self.cache.key(self.source)
+            path = self.cache.entry_path(key)
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+            paths.append(path)
+        entry_size = os.path.getsize(paths[0])
+
+        removed, freed = self.cache.prune(entry_size * 2)
+        self.assertEqual(removed, 1)
+        self.assertEqual(freed, entry_size)
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[1]))
+        self.assertTrue(os.path.exists(paths[2]))
+        self.assertLessEqual(self.cache.size(), entry_size * 2)
+
+    def test_generate_pages_counts_hits(self):
+        content = os.path.join(self.tmp.name, "content")
+        os.makedirs(content)
+        for i in range(3):
+            with open(os.path.join(content, f"page{i}.md"), "w") as f:
+                f.write(f"# Page {i}\n\nbody")
+        template_path = os.path.join(self.tmp.name, "template.html")
+        with open(template_path, "w") as f:
+            f.write("{{ Title }}{{ Content }}")
+        pages = find_pages(content, os.path.join(self.tmp.name, "public"))
+
+        generate_pages(pages, template_path, verbose=False, tree_cache=self.cache)
+        generate_pages(pages, template_path, verbose=False, tree_cache=self.cache)
+        self.assertEqual((self.cache.stats.hits, self.cache.stats.misses), (3, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from walk import default_ignore, ignore_matcher, walk_files
+
+
+class TestWalkFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, *rel_paths):
+        for rel_path in rel_paths:
+            path = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+
+    def test_sorted_depth_first(self):
+        self.touch("b.md", "a/z.md", "a/b/c.md", "a-b.md", "index.md")
+        self.assertEqual(
+            walk_files(self.root),
+            [os.path.join("a", "b", "c.md"), os.path.join("a", "z.md"), "a-b.md", "b.md", "index.md"],
+        )
+
+    def test_default_ignore(self):
+        self.touch("page.md", ".page.md.swp", "page.md~", ".git/HEAD", "sub/.#page.md")
+        self.assertEqual(walk_files(self.root), ["page.md"])
+        self.assertIn(".git", default_ignore)
+
+    def test_custom_ignore(self):
+        self.touch("index.md", "drafts/wip.md", "blog/drafts/keep.md", "blog/post.md")
+        self.assertEqual(
+            walk_files(self.root, ("drafts/",)),
+            [os.path.join("blog", "drafts", "keep.md"), os.path.join("blog", "post.md"), "index.md"],
+        )
+        self.assertEqual(walk_files(self.root, ("drafts",)), [os.path.join("blog", "post.md"), "index.md"])
+
+    def test_ignored_directory_not_descended(self):
+        self.touch("keep.md", "skip/a.md")
+        os.chmod(os.path.join(self.root, "skip"), 0)
+        try:
+            self.assertEqual(walk_files(self.root, ("skip",)), ["keep.md"])
+        finally:
+            os.chmod(os.path.join(self.root, "skip"), 0o755)
+
+    def test_deeper_than_recursion_limit(self):
+        depth = 200
+        rel_dir = os.path.join(*["d"] * depth)
+        self.touch(os.path.join(rel_dir, "deep.md"))
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100)
+        try:
+            files = walk_files(self.root)
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(files, [os.path.join(rel_dir, "deep.md")])
+
+    def test_ignore_matcher(self):
+        ignored = ignore_matcher(("*.tmp", "content/drafts/*"))
+        self.assertTrue(ignored("x.tmp", "x.tmp"))
+        self.assertTrue(ignored("a.md", os.path.join("content", "drafts", "a.md")))
+        self.assertFalse(ignored("a.md", os.path.join("content", "a.md")))
+
+
+if __name__ == "__main__":
+    unittest.main()
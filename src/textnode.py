@@ -7,7 +7,13 @@ text_type_code = "code"
 text_type_link = "link"
 text_type_image = "image"
 
+# Set while building with fingerprinted static assets (see assets.AssetMap);
+# link and image URLs pointing at static files are rewritten through it.
+asset_map = None
+
 class TextNode:
+	__slots__ = ("text", "text_type", "url")
+
 	def __init__(self, text, text_type, url=None):
 		self.text = text
 		self.text_type = text_type
@@ -34,9 +40,13 @@ def text_node_to_html_node(text_node: TextNode):
     elif text_node.text_type == text_type_code:
         return LeafNode("code", text_node.text)
     elif text_node.text_type == text_type_link:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return LeafNode("a", text_node.text, {"href": asset_url(text_node.url)})
     elif text_node.text_type == text_type_image:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        return LeafNode("img", "", {"src": asset_url(text_node.url), "alt": text_node.text})
     else:
         raise Exception(f"Invalid text type: {text_node.text_type}")
-    
+
+def asset_url(url):
+    if asset_map is None:
+        return url
+    return asset_map.rewrite(url)
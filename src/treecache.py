@@ -0,0 +1,129 @@
+import hashlib
+import os
+
+from depgraph import link_targets
+from instrument import CacheStats
+
+# Part of every cache key. Bump whenever parsing or HTML serialization can
+# produce different output for the same markdown, so stale entries are
+# never served.
+PARSER_VERSION = "1"
+
+chunk_size = 1 << 16
+
+
+class TreeCache:
+    """Content-addressed on-disk cache of rendered page bodies.
+
+    Entries are keyed by the hash of the markdown source plus PARSER_VERSION
+    and salt (anything else the body depends on) and hold the page title on
+    the first line followed by the body HTML, so a hit skips parsing
+    entirely. With an AssetMap, the key also covers the fingerprints of the
+    static files the page links to, and of no others, so editing an asset
+    only invalidates the bodies that reference it. Entries are touched when read, and prune()
+    evicts the least recently used ones until the cache fits in max_bytes.
+    """
+
+    def __init__(self, dir_path, max_bytes, salt="", assets=None):
+        self.dir_path = dir_path
+        self.max_bytes = max_bytes
+        self.salt = salt
+        self.assets = assets
+        self.stats = CacheStats("Tree cache", max_bytes)
+
+    def key(self, from_path):
+        digest = hashlib.sha256(f"{PARSER_VERSION}\0{self.salt}\0".encode())
+        with open(from_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        if self.assets is not None:
+            with open(from_path, "r") as f:
+                digest.update(self.assets.references_digest(link_targets(f)).encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.dir_path, key[:2], key + ".html")
+
+    def open_entry(self, key):
+        """Return (title, body_file) for a cached entry, or None on a miss.
+        The caller closes body_file."""
+        path = self.entry_path(key)
+        try:
+            body = open(path, "r")
+        except FileNotFoundError:
+            return None
+        title = body.readline()
+        if not title.endswith("\n"):
+            body.close()
+            return None
+        os.utime(path)
+        return title[:-1], body
+
+    def writer(self, key, title):
+        return EntryWriter(self.entry_path(key), title)
+
+    def entries(self):
+        entries = []
+        if not os.path.isdir(self.dir_path):
+            return entries
+        for shard in os.listdir(self.dir_path):
+            shard_path = os.path.join(self.dir_path, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for filename in os.listdir(shard_path):
+                path = os.path.join(shard_path, filename)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def prune(self, max_bytes=None):
+        """Evict least recently used entries until the cache fits in
+        max_bytes (default: the configured limit). Returns the number of
+        entries removed and the bytes freed."""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        freed = 0
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            freed += size
+            removed += 1
+        return removed, freed
+
+
+class EntryWriter:
+    """Collects body chunks as they stream past and publishes the entry
+    atomically on commit(), so a failed page never leaves a bad entry."""
+
+    def __init__(self, path, title):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(self.tmp_path, "w")
+        self.file.write(title + "\n")
+
+    def tee(self, chunks):
+        for chunk in chunks:
+            self.file.write(chunk)
+            yield chunk
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def iter_file_chunks(f):
+    return iter(lambda: f.read(chunk_size), "")
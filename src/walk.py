@@ -0,0 +1,51 @@
+import fnmatch
+import os
+import re
+
+# Skipped everywhere unless the caller passes its own patterns: version
+# control directories and editor swap/backup files.
+default_ignore = (".git", ".hg", ".svn", "*.swp", "*.swo", "*~", ".#*", "#*#", ".DS_Store")
+
+
+def ignore_matcher(patterns):
+    """Compile glob patterns into one matcher. A pattern containing "/" is
+    matched against the path relative to the walked root, any other pattern
+    against the bare file or directory name."""
+    name_patterns = [fnmatch.translate(p) for p in patterns if "/" not in p]
+    path_patterns = [fnmatch.translate(p.strip("/")) for p in patterns if "/" in p]
+    name_match = re.compile("|".join(name_patterns)).match if name_patterns else None
+    path_match = re.compile("|".join(path_patterns)).match if path_patterns else None
+
+    def ignored(name, rel_path):
+        if name_match is not None and name_match(name):
+            return True
+        return path_match is not None and path_match(rel_path.replace(os.sep, "/")) is not None
+
+    return ignored
+
+
+def walk_files(root, ignore=default_ignore):
+    """Return the paths of all files under root, relative to it.
+
+    The tree is walked iteratively with os.scandir, so depth is not limited
+    by the recursion limit and file types come from the directory entries
+    without a stat per file. Ignored directories are not descended into.
+    The result is sorted component by component, which is the order a
+    sorted depth-first walk produces, so builds are deterministic.
+    """
+    ignored = ignore_matcher(ignore)
+    files = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if ignored(entry.name, rel_path):
+                    continue
+                if entry.is_dir():
+                    stack.append(rel_path)
+                elif entry.is_file():
+                    files.append(rel_path)
+    files.sort(key=lambda rel_path: rel_path.split(os.sep))
+    return files